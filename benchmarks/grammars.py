@@ -0,0 +1,214 @@
+"""
+Gramáticas para los benchmarks: un generador paramétrico y algunas
+gramáticas realistas (JSON, un subconjunto de SQL y uno de C) con
+generadores de entradas largas.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+import random
+
+
+@dataclass(frozen=True)
+class SyntheticParams:
+    nonterminals: int = 20
+    alternatives: int = 3
+    nullable_density: float = 0.2
+    expression_depth: int = 3
+    max_body: int = 4
+    shared_terminals: int = 4
+    seed: int = 0
+
+    def label(self) -> str:
+        return (f"synth-n{self.nonterminals}-a{self.alternatives}-e{self.nullable_density:g}"
+                f"-d{self.expression_depth}-s{self.seed}")
+
+
+def synthetic_grammar(p: SyntheticParams) -> str:
+    """
+    Gramática aleatoria LR(1) por construcción.
+
+    Cada alternativa de N<i> empieza con un terminal propio `a<i>_<k>` y
+    termina con otro `z<i>_<k>`; en medio usa terminales compartidos,
+    no terminales N<j> con j > i (sin repetir) y la cadena de expresiones
+    E0..E<d>. Una fracción `nullable_density` de los no terminales tiene
+    además una alternativa ε.
+
+    La parte de los N<i> es LL(1): el primer token elige la alternativa, y
+    un N<j> anulable nunca empieza por lo que le sigue. La cadena
+    `E<k> -> E<k> op<k> E<k+1> | E<k+1>` es recursiva por la izquierda (no
+    LL(1)), pero es la gramática de precedencias clásica, LR(1) con un
+    operador distinto por nivel; los `op<k>` no aparecen en el resto de la
+    gramática, así que tras una E la decisión entre desplazar y reducir
+    depende solo de si viene un operador. El conjunto es LR(1).
+    """
+    rng = random.Random(p.seed)
+    n = max(1, p.nonterminals)
+    shared = [f"x{k}" for k in range(p.shared_terminals)]
+    # Cada N<j> (j > 0) debe ser alcanzable desde algún N<p> con p < j
+    required: Dict[int, List[int]] = {i: [] for i in range(n)}
+    for j in range(1, n):
+        required[rng.randrange(j)].append(j)
+
+    lines: List[str] = []
+    for i in range(n):
+        alts: List[str] = []
+        pending = list(required[i])
+        for k in range(p.alternatives):
+            pool = [f"N{j}" for j in range(i + 1, n)]
+            body: List[str] = []
+            while pending and len(body) < p.max_body - 1:
+                body.append(f"N{pending.pop()}")
+            for _ in range(rng.randint(0, max(0, p.max_body - len(body)))):
+                choice = rng.random()
+                if choice < 0.4 and shared:
+                    body.append(rng.choice(shared))
+                elif choice < 0.7 and p.expression_depth > 0 and "E0" not in body:
+                    body.append("E0")
+                else:
+                    candidates = [X for X in pool if X not in body]
+                    if candidates:
+                        body.append(rng.choice(candidates))
+            rng.shuffle(body)
+            alts.append(" ".join([f"a{i}_{k}"] + body + [f"z{i}_{k}"]))
+        # Los hijos que no cupieron van en una alternativa extra
+        while pending:
+            chunk = [f"N{pending.pop()}" for _ in range(min(len(pending), max(1, p.max_body - 1)))]
+            alts.append(" ".join([f"a{i}_{len(alts)}"] + chunk + [f"z{i}_{len(alts)}"]))
+        if i > 0 and rng.random() < p.nullable_density:
+            alts.append("ε")
+        lines.append(f"N{i} -> " + " | ".join(alts))
+
+    d = p.expression_depth
+    for k in range(d):
+        lines.append(f"E{k} -> E{k} op{k} E{k + 1} | E{k + 1}")
+    if d > 0:
+        lines.append(f"E{d} -> ( E0 ) | id")
+    return "\n".join(lines)
+
+
+JSON_GRAMMAR = """\
+Value -> Object | Array | string | number | true | false | null
+Object -> { } | { Members }
+Members -> Pair | Members , Pair
+Pair -> string : Value
+Array -> [ ] | [ Elements ]
+Elements -> Value | Elements , Value"""
+
+
+SQL_GRAMMAR = """\
+Script -> Stmt ; | Script Stmt ;
+Stmt -> Select | Insert | Update | Delete
+Select -> SELECT SelList FROM TableList OptWhere OptGroup OptOrder
+SelList -> * | ColList
+ColList -> Col | ColList , Col
+Col -> Expr | Expr AS id
+TableList -> Table | TableList , Table | TableList JOIN Table ON Cond
+Table -> id | id id
+OptWhere -> WHERE Cond | ε
+OptGroup -> GROUP BY ColRefs | ε
+OptOrder -> ORDER BY ColRefs | ε
+ColRefs -> ColRef | ColRefs , ColRef
+ColRef -> id | id . id
+Insert -> INSERT INTO id ( IdList ) VALUES ( ExprList )
+IdList -> id | IdList , id
+Update -> UPDATE id SET Assigns OptWhere
+Assigns -> id = Expr | Assigns , id = Expr
+Delete -> DELETE FROM id OptWhere
+Cond -> Cond OR AndCond | AndCond
+AndCond -> AndCond AND NotCond | NotCond
+NotCond -> NOT NotCond | Pred
+Pred -> Expr CmpOp Expr | ( Cond )
+CmpOp -> = | < | > | <= | >= | <>
+ExprList -> Expr | ExprList , Expr
+Expr -> Expr + Term | Expr - Term | Term
+Term -> Term * Factor | Term / Factor | Factor
+Factor -> ColRef | num | str | FuncCall | ( Expr )
+FuncCall -> fn ( ExprList )"""
+
+
+# `||` y `&&` se escriben `or`/`and`: parse_bnf separa alternativas en cada '|'
+C_GRAMMAR = """\
+Unit -> ExtDecl | Unit ExtDecl
+ExtDecl -> FuncDef | Decl
+FuncDef -> Type id ( OptParams ) Block
+OptParams -> Params | void | ε
+Params -> Param | Params , Param
+Param -> Type id
+Type -> int | char | float | void | Type *
+Decl -> Type InitList ;
+InitList -> Init | InitList , Init
+Init -> id | id = Expr | id [ num ]
+Block -> { Items }
+Items -> Items Item | ε
+Item -> Decl | Stmt
+Stmt -> Matched | Unmatched
+Matched -> if ( Expr ) Matched else Matched | Other
+Unmatched -> if ( Expr ) Stmt | if ( Expr ) Matched else Unmatched
+Other -> ExprStmt | Block | while ( Expr ) Matched | return OptExpr ; | break ; | continue ;
+ExprStmt -> Expr ; | ;
+OptExpr -> Expr | ε
+Expr -> Unary = Expr | OrExpr
+OrExpr -> OrExpr or AndExpr | AndExpr
+AndExpr -> AndExpr and EqExpr | EqExpr
+EqExpr -> EqExpr == RelExpr | EqExpr != RelExpr | RelExpr
+RelExpr -> RelExpr < AddExpr | RelExpr > AddExpr | AddExpr
+AddExpr -> AddExpr + MulExpr | AddExpr - MulExpr | MulExpr
+MulExpr -> MulExpr * Unary | MulExpr / Unary | Unary
+Unary -> - Unary | ! Unary | * Unary | & Unary | Postfix
+Postfix -> Postfix [ Expr ] | Postfix ( OptArgs ) | Primary
+OptArgs -> Args | ε
+Args -> Expr | Args , Expr
+Primary -> id | num | ( Expr )"""
+
+
+def json_input(n: int, rng: random.Random) -> List[str]:
+    out = ["["]
+    for i in range(n):
+        if i:
+            out.append(",")
+        out += ["{", "string", ":", rng.choice(["number", "string", "true", "null"]), ",",
+                "string", ":", "[", "number", ",", "number", "]", "}"]
+    out.append("]")
+    return out
+
+
+def sql_input(n: int, rng: random.Random) -> List[str]:
+    statements = [
+        "SELECT id , fn ( id . id , num ) AS id FROM id id JOIN id ON id . id = id . id WHERE id > num AND NOT id = str ORDER BY id ;",
+        "INSERT INTO id ( id , id ) VALUES ( num , str ) ;",
+        "UPDATE id SET id = id + num * ( num - id ) WHERE id <> num OR id < num ;",
+        "DELETE FROM id WHERE ( id = num ) ;",
+        "SELECT * FROM id GROUP BY id , id . id ;",
+    ]
+    out: List[str] = []
+    for _ in range(n):
+        out += rng.choice(statements).split()
+    return out
+
+
+def c_input(n: int, rng: random.Random) -> List[str]:
+    functions = [
+        "int id ( int id , char * id ) { int id = num , id [ num ] ; while ( id < num ) { id = id + num ; } return id ; }",
+        "void id ( void ) { if ( id == num and id ) if ( id or ! id ) id ( id , num ) ; else id = - id ; return ; }",
+        "float * id ( ) { float * id ; id = & id [ num ] ; return id ; }",
+        "int id ;",
+    ]
+    out: List[str] = []
+    for _ in range(n):
+        out += rng.choice(functions).split()
+    return out
+
+
+@dataclass(frozen=True)
+class RealisticCase:
+    name: str
+    grammar: str
+    make_input: Callable[[int, random.Random], List[str]]
+
+
+REALISTIC: List[RealisticCase] = [
+    RealisticCase("json", JSON_GRAMMAR, json_input),
+    RealisticCase("sql", SQL_GRAMMAR, sql_input),
+    RealisticCase("c", C_GRAMMAR, c_input),
+]
@@ -0,0 +1,234 @@
+"""
+Benchmarks del pipeline LR(1).
+
+    python -m benchmarks.run                     # suite rápida a stdout
+    python -m benchmarks.run --suite full -o resultados.jsonl
+    python -m benchmarks.run --compare base.jsonl nuevo.jsonl
+
+Cada fase (FIRST/FOLLOW, construcción de tablas, análisis de entradas
+válidas y de entradas mutadas que se rechazan, y las dos juntas con el
+reconocedor por lotes) se mide por separado y
+produce una línea JSON con tiempo, pico de memoria de tracemalloc,
+estados y tamaño de las tablas. El tiempo se toma en una
+pasada sin tracemalloc (mínimo de `--repeat`) y la memoria en otra, para
+que el trazado no infle los tiempos. Cada registro lleva el commit y la
+versión de Python para poder seguir regresiones entre commits.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pts_extra.batch import BatchRecognizer
+from pts_extra.grammar import Grammar
+from pts_extra.lr1 import LR1Builder
+from pts_extra.parser import LR1Parser
+from pts_extra.sentences import SentenceGenerator
+from pts_extra.tables import dense_tables
+
+from .grammars import REALISTIC, SyntheticParams, synthetic_grammar
+
+SUITES: Dict[str, List[SyntheticParams]] = {
+    "quick": [
+        SyntheticParams(nonterminals=10, alternatives=2, nullable_density=0.2, expression_depth=2),
+        SyntheticParams(nonterminals=20, alternatives=3, nullable_density=0.2, expression_depth=3),
+        SyntheticParams(nonterminals=20, alternatives=3, nullable_density=0.6, expression_depth=3),
+    ],
+    "full": [
+        SyntheticParams(nonterminals=n, alternatives=a, nullable_density=e, expression_depth=d)
+        for n in (10, 40, 80)
+        for a in (2, 4)
+        for e in (0.0, 0.5)
+        for d in (2, 5)
+    ],
+}
+
+# (oraciones generadas, tokens máximos por oración, unidades de las entradas realistas)
+INPUT_SIZES = {"quick": (50, 200, 50), "full": (500, 1000, 500)}
+
+
+def _measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Tuple[Any, float, Optional[int]]:
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def _first_follow(g: Grammar):
+    # compute_follow calcula FIRST internamente
+    return g.compute_follow()
+
+
+def _build(g: Grammar) -> LR1Builder:
+    builder = LR1Builder(g)
+    builder.build_tables()
+    return builder
+
+
+def bench_case(name: str, text: str, inputs: List[List[str]], params: Dict[str, Any],
+               repeat: int, memory: bool, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    g = Grammar.parse_bnf(text)
+    base = {
+        "case": name,
+        "params": params,
+        "nonterminals": len(g.nonterminals),
+        "terminals": len(g.terminals),
+        "productions": sum(len(alts) for alts in g.productions.values()),
+    }
+
+    _, seconds, peak = _measure(lambda: _first_follow(g), repeat, memory)
+    yield dict(base, phase="first_follow", seconds=seconds, peak_bytes=peak)
+
+    builder, seconds, peak = _measure(lambda: _build(g), repeat, memory)
+    dense = dense_tables(builder)
+    yield dict(base, phase="build_tables", seconds=seconds, peak_bytes=peak,
+               states=len(builder.states), action_entries=len(builder.action),
+               goto_entries=len(builder.goto_table), conflicts=len(builder.conflicts),
+               closure_calls=builder.closure_calls,
+               dense_table_bytes=dense.action_kind.nbytes + dense.action_arg.nbytes + dense.goto.nbytes)
+
+    if builder.conflicts or not inputs:
+        return
+    parser = LR1Parser(builder.grammar, builder.action, builder.goto_table)
+    # Entradas casi válidas del mismo tamaño para medir el camino de error
+    gen = SentenceGenerator(g, max_length=max(len(t) for t in inputs) + 1, seed=seed)
+    try:
+        rejected = list(gen.rejected(len(inputs), parser=parser))
+    except ValueError:
+        rejected = []  # Casi toda cadena es del lenguaje: no hay camino de error que medir
+
+    def parse_all(batch):
+        ok = 0
+        for tokens in batch:
+            ok += bool(parser.parse(tokens, trace=False)["accepted"])
+        return ok
+
+    for phase, batch in (("parse", inputs), ("parse_rejected", rejected)):
+        if not batch:
+            continue
+        accepted, seconds, peak = _measure(lambda: parse_all(batch), repeat, memory)
+        tokens = sum(len(t) for t in batch)
+        yield dict(base, phase=phase, seconds=seconds, peak_bytes=peak, inputs=len(batch),
+                   accepted=accepted, tokens=tokens, tokens_per_second=tokens / seconds if seconds > 0 else None)
+
+    # Las mismas entradas (válidas y rechazadas) con el reconocedor por lotes
+    recognizer = BatchRecognizer(dense)
+    encoded = recognizer.encode(inputs + rejected)
+    result, seconds, peak = _measure(lambda: recognizer.recognize(*encoded), repeat, memory)
+    tokens = int(encoded[1].sum())
+    yield dict(base, phase="recognize_batch", seconds=seconds, peak_bytes=peak, inputs=len(inputs) + len(rejected),
+               accepted=int(result.accepted.sum()), tokens=tokens,
+               tokens_per_second=tokens / seconds if seconds > 0 else None)
+
+
+def iter_cases(suite: str, seed: int) -> Iterator[Tuple[str, str, List[List[str]], Dict[str, Any]]]:
+    count, max_length, units = INPUT_SIZES[suite]
+    for p in SUITES[suite]:
+        p = SyntheticParams(**dict(p.__dict__, seed=seed))
+        text = synthetic_grammar(p)
+        gen = SentenceGenerator(Grammar.parse_bnf(text), max_length=max_length, seed=seed)
+        yield p.label(), text, list(gen.stream(count)), dict(p.__dict__)
+    for case in REALISTIC:
+        rng = random.Random(seed)
+        yield case.name, case.grammar, [case.make_input(units, rng)], {"input_units": units}
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run(suite: str, repeat: int, memory: bool, seed: int, only: Optional[str], out) -> None:
+    env = _environment()
+    for name, text, inputs, params in iter_cases(suite, seed):
+        if only and only not in name:
+            continue
+        for record in bench_case(name, text, inputs, params, repeat, memory, seed):
+            out.write(json.dumps(dict(record, **env), ensure_ascii=False) + "\n")
+            out.flush()
+
+
+def _load(path: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    records = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                r = json.loads(line)
+                records[(r["case"], r["phase"])] = r
+    return records
+
+
+def compare(base_path: str, new_path: str, threshold: float, out) -> int:
+    """Compara dos ejecuciones; código 1 si alguna fase empeora más de `threshold`."""
+    base, new = _load(base_path), _load(new_path)
+    worse = 0
+    for key in sorted(base.keys() & new.keys()):
+        b, n = base[key], new[key]
+        ratio = n["seconds"] / b["seconds"] if b["seconds"] > 0 else float("inf")
+        mem = ""
+        if b.get("peak_bytes") and n.get("peak_bytes"):
+            mem = f"  mem x{n['peak_bytes'] / b['peak_bytes']:.2f}"
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- regresión"
+            worse += 1
+        out.write(f"{key[0]:<40} {key[1]:<13} {b['seconds'] * 1000:10.2f} ms -> "
+                  f"{n['seconds'] * 1000:10.2f} ms  x{ratio:.2f}{mem}{flag}\n")
+    return 1 if worse else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmarks del pipeline LR(1)")
+    ap.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    ap.add_argument("--repeat", type=int, default=3, help="repeticiones por fase (se toma el mínimo)")
+    ap.add_argument("--no-memory", action="store_true", help="omite la pasada con tracemalloc")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", help="solo los casos cuyo nombre contenga este texto")
+    ap.add_argument("-o", "--output", help="archivo JSON por líneas (por defecto stdout)")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NUEVO"), help="compara dos ejecuciones")
+    ap.add_argument("--threshold", type=float, default=0.10, help="empeoramiento tolerado en --compare")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold, sys.stdout)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        run(args.suite, args.repeat, not args.no_memory, args.seed, args.only, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+import multiprocessing as mp
+import pickle
+import queue
+import threading
+import time
+
+from .metrics import Metrics
+from .pipeline import CompiledGrammar, compile_grammar
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+
+@dataclass
+class BuildProgress:
+    states: int = 0
+    worklist: int = 0
+    closure_calls: int = 0
+    elapsed: float = 0.0
+
+
+def _limit_memory(memory_limit_mb: Optional[int]) -> None:
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # Windows: sin límite de memoria, solo de tiempo
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker(text: str, out, memory_limit_mb: Optional[int], interval: float, metrics: bool = False) -> None:
+    _limit_memory(memory_limit_mb)
+    last = 0.0
+
+    def progress(states: int, worklist: int, closure_calls: int):
+        nonlocal last
+        now = time.monotonic()
+        if now - last >= interval:
+            last = now
+            out.put(("progress", (states, worklist, closure_calls)))
+
+    try:
+        compiled = compile_grammar(text, progress, Metrics() if metrics else None)
+    except MemoryError:
+        out.put(("error", f"Se superó el límite de memoria ({memory_limit_mb} MB)"))
+        return
+    except Exception as e:
+        out.put(("error", f"{type(e).__name__}: {e}"))
+        return
+    # Se serializa aquí: `Queue.put` lo hace en un hilo aparte, donde un
+    # MemoryError se perdería y el proceso padre solo vería el final del worker
+    try:
+        data = pickle.dumps(compiled, protocol=pickle.HIGHEST_PROTOCOL)
+    except MemoryError:
+        out.put(("error", f"Se superó el límite de memoria ({memory_limit_mb} MB)"))
+        return
+    out.put(("done", data))
+
+
+class BuildJob:
+    """
+    Construcción de tablas LR(1) en un proceso aparte.
+
+    `poll()` no bloquea: recoge el progreso enviado por el worker (estados
+    descubiertos, tamaño de la worklist, llamadas a closure) y aplica el
+    límite de tiempo. El límite de memoria se aplica en el propio worker con
+    RLIMIT_AS (solo en sistemas Unix). `cancel()` termina el proceso.
+    Con `metrics=True` el resultado trae un `Metrics` de la construcción.
+    """
+
+    def __init__(self, text: str, timeout: Optional[float] = None, memory_limit_mb: Optional[int] = None,
+                 progress_interval: float = 0.1, metrics: bool = False):
+        self.text = text
+        self.metrics = metrics
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.progress_interval = progress_interval
+        self.status = PENDING
+        self.progress = BuildProgress()
+        self.error: Optional[str] = None
+        self._result: Optional[CompiledGrammar] = None
+        self._ctx = mp.get_context("spawn")
+        self._queue = None
+        self._process = None
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> "BuildJob":
+        if self.status != PENDING:
+            return self
+        self._queue = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker,
+            args=(self.text, self._queue, self.memory_limit_mb, self.progress_interval, self.metrics),
+            daemon=True,
+        )
+        self._started = time.monotonic()
+        self._process.start()
+        self.status = RUNNING
+        return self
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in (PENDING, RUNNING)
+
+    def poll(self) -> BuildProgress:
+        with self._lock:
+            return self._poll()
+
+    def _poll(self) -> BuildProgress:
+        if self.status != RUNNING:
+            return self.progress
+        self.progress.elapsed = time.monotonic() - self._started
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                states, worklist, closure_calls = payload
+                self.progress.states = states
+                self.progress.worklist = worklist
+                self.progress.closure_calls = closure_calls
+            elif kind == "done":
+                self._result = compiled = pickle.loads(payload)
+                self.progress.states = len(compiled.builder.states)
+                self.progress.worklist = 0
+                self.progress.closure_calls = compiled.builder.closure_calls
+                self._finish(DONE)
+                return self.progress
+            else:
+                self._finish(FAILED, payload)
+                return self.progress
+        if self.timeout is not None and self.progress.elapsed > self.timeout:
+            self._finish(TIMEOUT, f"Se superó el tiempo límite ({self.timeout:g} s)")
+        elif not self._process.is_alive() and self._queue.empty():
+            # Terminado sin mensaje: p. ej. el sistema lo mató por memoria
+            error = f"El proceso terminó inesperadamente (código {self._process.exitcode})"
+            if self.memory_limit_mb:
+                error += f"; posible límite de memoria ({self.memory_limit_mb} MB)"
+            self._finish(FAILED, error)
+        return self.progress
+
+    def wait(self, interval: float = 0.1) -> Optional[CompiledGrammar]:
+        while not self.finished:
+            self.poll()
+            if not self.finished:
+                time.sleep(interval)
+        return self._result
+
+    def cancel(self) -> None:
+        with self._lock:
+            if not self.finished:
+                self._finish(CANCELLED, "Construcción cancelada")
+
+    def result(self) -> CompiledGrammar:
+        if self.status != DONE:
+            raise RuntimeError(self.error or f"La construcción no ha terminado ({self.status})")
+        return self._result
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process.join(timeout=1)
+        if self._queue is not None:
+            self._queue.close()
@@ -0,0 +1,172 @@
+"""
+Reconocedor por lotes: decide si muchas cadenas cortas pertenecen al
+lenguaje avanzándolas todas a la vez sobre las tablas densas.
+
+La entrada es una matriz de ids de terminales (una fila por cadena,
+rellena hasta la más larga) y las longitudes de cada fila. En cada paso
+se leen con un solo gather ACTION[estado, token] para todas las filas
+activas y se aplica su acción: desplazar, reducir (un gather más en GOTO)
+o terminar. Las pilas de estados son un búfer NumPy (filas × capacidad)
+reservado de antemano que se duplica si alguna fila lo llena. El número de
+pasos es el de la cadena que más acciones necesita; las filas que terminan
+salen del conjunto activo.
+
+Solo reconoce: no devuelve reducciones ni pasos. Para eso está
+`LR1Parser`, que da el mismo veredicto y la misma posición de error.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .grammar import Grammar, Symbol
+from .tables import ACCEPT, ERROR, REDUCE, SHIFT, DenseTables
+
+# Id de los tokens que no son terminales de la gramática
+UNKNOWN = -1
+
+
+@dataclass
+class BatchResult:
+    """
+    `accepted[i]` indica si la fila i se acepta; si no, `error_position[i]`
+    es el índice del token sin acción (la longitud si faltó entrada) y
+    `error_state[i]` el estado en que ocurrió. Ambos valen -1 en las aceptadas.
+    Si lo que faltó fue GOTO tras una reducción, `error_nonterminal[i]` es el
+    id (en `DenseTables.nonterminals`) de la cabeza reducida; si no, -1.
+    """
+    accepted: np.ndarray
+    error_position: np.ndarray
+    error_state: np.ndarray
+    error_nonterminal: np.ndarray
+
+
+class BatchRecognizer:
+    def __init__(self, tables: DenseTables, stack_capacity: int = 64):
+        self.tables = tables
+        self.stack_capacity = max(2, stack_capacity)
+        self.terminal_ids = tables.terminal_ids()
+        self.end_id = self.terminal_ids[Grammar.END_MARKER]
+        nt_ids = tables.nonterminal_ids()
+        self._prod_len = np.array([0 if list(body) == [Grammar.EPSILON] else len(body)
+                                   for _, body in tables.productions], dtype=np.int64)
+        self._prod_head = np.array([nt_ids[head] for head, _ in tables.productions], dtype=np.int64)
+        # Una columna más en ACTION para UNKNOWN, siempre ERROR
+        n_states = tables.n_states
+        self._kind = np.concatenate([tables.action_kind, np.full((n_states, 1), ERROR, dtype=np.int8)], axis=1)
+        self._arg = np.concatenate([tables.action_arg, np.zeros((n_states, 1), dtype=np.int32)], axis=1)
+        self._unknown_col = tables.action_kind.shape[1]
+
+    def encode(self, sentences: Sequence[Sequence[Symbol]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Matriz de ids (rellena con el id de `$`) y longitudes de una lista de cadenas."""
+        lengths = np.fromiter((len(s) for s in sentences), dtype=np.int64, count=len(sentences))
+        width = int(lengths.max()) if len(sentences) else 0
+        tokens = np.full((len(sentences), width), self.end_id, dtype=np.int32)
+        ids = self.terminal_ids
+        for i, s in enumerate(sentences):
+            tokens[i, :len(s)] = [ids.get(t, UNKNOWN) for t in s]
+        return tokens, lengths
+
+    def recognize(self, tokens: np.ndarray, lengths: Optional[np.ndarray] = None) -> BatchResult:
+        """
+        Reconoce cada fila de `tokens` (ids de `DenseTables.terminals`, o
+        UNKNOWN) hasta su longitud; sin `lengths` se usa la fila entera.
+        """
+        tokens = np.asarray(tokens)
+        n, width = tokens.shape
+        lengths = np.full(n, width, dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+        # Columna final con `$` para que toda fila termine dentro de la matriz
+        padded = np.empty((n, width + 1), dtype=np.int64)
+        padded[:, :width] = tokens
+        padded[np.arange(width + 1)[None, :] >= lengths[:, None]] = self.end_id
+        padded[padded < 0] = self._unknown_col
+        padded[padded > self._unknown_col] = self._unknown_col
+
+        kind_table, arg_table, goto = self._kind, self._arg, self.tables.goto
+        prod_len, prod_head = self._prod_len, self._prod_head
+        stack = np.zeros((n, self.stack_capacity), dtype=np.int32)
+        sp = np.zeros(n, dtype=np.int64)
+        pos = np.zeros(n, dtype=np.int64)
+        accepted = np.zeros(n, dtype=bool)
+        error_position = np.full(n, -1, dtype=np.int64)
+        error_state = np.full(n, -1, dtype=np.int64)
+        error_nonterminal = np.full(n, -1, dtype=np.int64)
+
+        active = np.arange(n)
+        while active.size:
+            top = sp[active]
+            s = stack[active, top]
+            p = pos[active]
+            a = padded[active, p]
+            kind = kind_table[s, a]
+            arg = arg_table[s, a]
+
+            done = (kind == ERROR) | (kind == ACCEPT)
+            if done.any():
+                rows = active[done]
+                ok = kind[done] == ACCEPT
+                accepted[rows] = ok
+                failed = rows[~ok]
+                error_position[failed] = pos[failed]
+                error_state[failed] = s[done][~ok]
+
+            shift = kind == SHIFT
+            if shift.any():
+                rows = active[shift]
+                new_top = top[shift] + 1
+                if new_top.max() >= stack.shape[1]:
+                    stack = self._grow(stack)
+                stack[rows, new_top] = arg[shift]
+                sp[rows] = new_top
+                pos[rows] += 1
+
+            reduce = kind == REDUCE
+            if reduce.any():
+                rows = active[reduce]
+                prod = arg[reduce]
+                base = top[reduce] - prod_len[prod]
+                g = goto[stack[rows, base], prod_head[prod]]
+                bad = g < 0
+                if bad.any():
+                    # Tablas inconsistentes: se trata como error en el token actual
+                    error_position[rows[bad]] = pos[rows[bad]]
+                    error_state[rows[bad]] = stack[rows[bad], base[bad]]
+                    error_nonterminal[rows[bad]] = prod_head[prod[bad]]
+                    reduce_done = np.zeros_like(reduce)
+                    reduce_done[np.flatnonzero(reduce)[bad]] = True
+                    done |= reduce_done
+                    rows, base, g = rows[~bad], base[~bad], g[~bad]
+                new_top = base + 1
+                if new_top.size and new_top.max() >= stack.shape[1]:
+                    stack = self._grow(stack)
+                stack[rows, new_top] = g
+                sp[rows] = new_top
+
+            if done.any():
+                active = active[~done]
+        return BatchResult(accepted, error_position, error_state, error_nonterminal)
+
+    @staticmethod
+    def _grow(stack: np.ndarray) -> np.ndarray:
+        grown = np.zeros((stack.shape[0], stack.shape[1] * 2), dtype=stack.dtype)
+        grown[:, :stack.shape[1]] = stack
+        return grown
+
+    def recognize_sentences(self, sentences: Sequence[Sequence[Symbol]]) -> BatchResult:
+        return self.recognize(*self.encode(sentences))
+
+    def error_messages(self, sentences: Sequence[Sequence[Symbol]], result: BatchResult) -> List[Optional[str]]:
+        """Mensaje de error de cada cadena, con el mismo texto que `LR1Parser`."""
+        out: List[Optional[str]] = []
+        nonterminals = self.tables.nonterminals
+        for s, ok, p, st, nt in zip(sentences, result.accepted, result.error_position, result.error_state,
+                                    result.error_nonterminal):
+            if ok:
+                out.append(None)
+            elif nt >= 0:
+                out.append(f'No hay transición GOTO para ({int(st)}, {nonterminals[nt]})')
+            else:
+                a = s[p] if p < len(s) else Grammar.END_MARKER
+                out.append(f'No hay acción para estado {int(st)} y símbolo {a}')
+        return out
@@ -0,0 +1,336 @@
+"""
+Línea de comandos sin Streamlit:
+
+    python -m pts_extra compile gramatica.bnf -o tablas.lr1
+    python -m pts_extra parse -t tablas.lr1 entradas.txt
+    echo "id + id" | python -m pts_extra parse -g gramatica.bnf --timing
+    python -m pts_extra parse -g gramatica.bnf --lazy entradas.txt
+    python -m pts_extra parse -t tablas.lr1 --batch 4096 -q registros.txt
+    python -m pts_extra parse -t tablas.lr1 --parallel --workers 8 programa_enorme.txt
+    python -m pts_extra generate gramatica.bnf -n 1000 --max-length 200 --invalid
+    python -m pts_extra serve --port 8765 --workers 4
+
+Cada línea no vacía de la entrada es una cadena de tokens separados por
+espacios. Los módulos del paquete se importan dentro de cada comando para
+que el arranque sea rápido.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import sys
+import time
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+
+class _Timer:
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    def measure(self, name: str, start: float) -> None:
+        self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, out: TextIO, extra: Optional[List[str]] = None) -> None:
+        for name, seconds in self.phases:
+            print(f"{name:<12} {seconds * 1000:10.2f} ms", file=out)
+        for line in extra or []:
+            print(line, file=out)
+
+
+def _read(path: str) -> str:
+    with open(path, encoding="utf-8") as fh:
+        return fh.read()
+
+
+def _compile(grammar_path: str, timer: _Timer, metrics=None, **options):
+    """Compila la gramática; `options` se pasan a `compile_grammar` (reducción)."""
+    from .pipeline import TableArtifact, compile_grammar
+
+    text = _read(grammar_path)
+    start = time.perf_counter()
+    compiled = compile_grammar(text, metrics=metrics, source=grammar_path, **options)
+    timer.measure("compilar", start)
+    return TableArtifact.from_compiled(compiled), compiled.reduction
+
+
+def _new_metrics(args):
+    if not args.metrics:
+        return None
+    from .metrics import Metrics
+    return Metrics()
+
+
+def _report_metrics(args, metrics) -> None:
+    if metrics is None:
+        return
+    text = metrics.to_prometheus() if args.metrics == "prometheus" else metrics.to_json(indent=2) + "\n"
+    sys.stderr.write(text)
+
+
+def cmd_compile(args) -> int:
+    from .pipeline import save_artifact
+
+    timer = _Timer()
+    metrics = _new_metrics(args)
+    try:
+        artifact, reduction = _compile(args.grammar, timer, metrics, reduce=not args.no_reduce,
+                                       inline=args.inline, compare_states=args.compare_states)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if reduction is not None:
+        for line in reduction.lines():
+            print(f"reducción: {line}", file=sys.stderr)
+    start = time.perf_counter()
+    save_artifact(artifact, args.output)
+    timer.measure("guardar", start)
+    print(f"{args.output}: {artifact.n_states} estados, {len(artifact.action)} entradas ACTION, "
+          f"{len(artifact.goto)} entradas GOTO", file=sys.stderr)
+    for c in artifact.conflicts:
+        print(f"conflicto: {c}", file=sys.stderr)
+    if args.timing:
+        timer.report(sys.stderr)
+    _report_metrics(args, metrics)
+    return 1 if artifact.conflicts else 0
+
+
+def _input_lines(paths: List[str]) -> Iterator[Tuple[str, int, str]]:
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for lineno, line in enumerate(fh, start=1):
+                line = line.strip()
+                if line:
+                    yield path, lineno, line
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+
+def _parse_each(parser, lines, elapsed: List[float]) -> Iterator[Tuple[str, int, int, bool, Optional[str]]]:
+    for path, lineno, line in lines:
+        tokens = line.split()
+        start = time.perf_counter()
+        result = parser.parse(tokens, trace=False)
+        elapsed[0] += time.perf_counter() - start
+        yield path, lineno, len(tokens), bool(result['accepted']), result.get('error')
+
+
+def _recognize_batches(recognizer, lines, size: int, elapsed: List[float],
+                       metrics=None) -> Iterator[Tuple[str, int, int, bool, Optional[str]]]:
+    # Se leen `size` líneas, se reconocen juntas y se emiten en orden
+    while True:
+        block = list(itertools.islice(lines, size))
+        if not block:
+            return
+        sentences = [line.split() for _, _, line in block]
+        start = time.perf_counter()
+        result = recognizer.recognize_sentences(sentences)
+        seconds = time.perf_counter() - start
+        elapsed[0] += seconds
+        errors = recognizer.error_messages(sentences, result)
+        if metrics is not None:
+            metrics.add_time("recognize_batch", seconds)
+            metrics.count("parses", len(block))
+            metrics.count("accepted", int(result.accepted.sum()))
+            metrics.count("tokens", sum(len(t) for t in sentences))
+        for (path, lineno, _), tokens, ok, error in zip(block, sentences, result.accepted, errors):
+            yield path, lineno, len(tokens), bool(ok), error
+
+
+def cmd_parse(args) -> int:
+    import json
+    from .lazy import LazyConflictError
+    from .pipeline import load_artifact
+
+    if args.lazy and not args.grammar:
+        print("error: --lazy necesita la gramática (-g)", file=sys.stderr)
+        return 2
+    if sum(map(bool, (args.lazy, args.batch, args.parallel))) > 1:
+        print("error: --lazy, --batch y --parallel no se pueden combinar", file=sys.stderr)
+        return 2
+    timer = _Timer()
+    metrics = _new_metrics(args)
+    try:
+        if args.lazy:
+            from .lazy import LazyLR1Automaton
+            from .loader import load_grammar
+            from .reduction import reduce_grammar
+
+            start = time.perf_counter()
+            grammar, _ = reduce_grammar(load_grammar(args.grammar))
+            automaton = LazyLR1Automaton(grammar, args.max_rows, metrics)
+            timer.measure("preparar", start)
+        elif args.tables:
+            start = time.perf_counter()
+            artifact = load_artifact(args.tables)
+            timer.measure("cargar", start)
+        else:
+            artifact, _ = _compile(args.grammar, timer, metrics)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if args.lazy:
+        parser = automaton.parser(metrics)
+    elif artifact.conflicts:
+        print(f"error: la gramática tiene {len(artifact.conflicts)} conflicto(s) y no es LR(1)", file=sys.stderr)
+        return 2
+    else:
+        parser = artifact.parser()
+        parser.metrics = metrics
+    out = sys.stdout
+    lines = accepted = tokens_total = 0
+    elapsed = [0.0]
+    if args.parallel:
+        from .parallel import ParallelParser
+        try:
+            parser = ParallelParser(artifact, args.sync, args.chunk, workers=args.workers, metrics=metrics)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+    if args.batch:
+        from .batch import BatchRecognizer
+        recognizer = BatchRecognizer(artifact.dense_tables())
+        results = _recognize_batches(recognizer, _input_lines(args.inputs), args.batch, elapsed, metrics)
+    else:
+        results = _parse_each(parser, _input_lines(args.inputs), elapsed)
+    try:
+        for path, lineno, n_tokens, ok, error in results:
+            lines += 1
+            tokens_total += n_tokens
+            accepted += ok
+            if args.quiet:
+                continue
+            if args.json:
+                out.write(json.dumps({"file": path, "line": lineno, "accepted": ok, "error": error},
+                                     ensure_ascii=False) + "\n")
+            elif ok:
+                out.write(f"{path}:{lineno}\tok\n")
+            else:
+                out.write(f"{path}:{lineno}\terror\t{error}\n")
+    except LazyConflictError as e:
+        for c in e.conflicts:
+            print(f"conflicto: {c}", file=sys.stderr)
+        print(f"error: la gramática tiene {len(e.conflicts)} conflicto(s) y no es LR(1)", file=sys.stderr)
+        return 2
+    finally:
+        if args.parallel:
+            parser.close()
+    parse_time = elapsed[0]
+
+    if args.timing:
+        timer.phases.append(("analizar", parse_time))
+        rate = tokens_total / parse_time if parse_time > 0 else 0.0
+        extra = [
+            f"cadenas      {lines:10d} ({accepted} aceptadas, {lines - accepted} rechazadas)",
+            f"tokens       {tokens_total:10d} ({rate:,.0f} tokens/s)",
+        ]
+        if args.lazy:
+            extra.append(f"estados      {automaton.n_states:10d} ({automaton.row_builds} filas construidas, "
+                         f"{automaton.evictions} descartadas)")
+        timer.report(sys.stderr, extra)
+    _report_metrics(args, metrics)
+    return 0 if accepted == lines else 1
+
+
+def cmd_generate(args) -> int:
+    from .loader import load_grammar
+    from .sentences import SentenceGenerator
+
+    try:
+        grammar = load_grammar(args.grammar)
+        gen = SentenceGenerator(grammar, max_length=args.max_length, target_length=args.target_length, seed=args.seed)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if args.invalid:
+        from .pipeline import TableArtifact, compile_grammar
+        artifact = TableArtifact.from_compiled(compile_grammar(_read(args.grammar), source=args.grammar))
+        parser = None if artifact.conflicts else artifact.parser()
+        sentences = gen.rejected(args.count, parser=parser)
+    else:
+        sentences = gen.stream(args.count)
+    out = sys.stdout
+    try:
+        for tokens in sentences:
+            out.write(" ".join(tokens) + "\n")
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(f"cobertura de producciones: {gen.production_coverage():.0%}", file=sys.stderr)
+    return 0
+
+
+def cmd_serve(args) -> int:
+    import asyncio
+    from .service import serve
+
+    try:
+        asyncio.run(serve(args.host, args.port, max_workers=args.workers, max_grammars=args.max_grammars,
+                          max_batch=args.max_batch, max_inflight=args.max_inflight))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m pts_extra", description="Compilador y analizador LR(1) por lotes")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    c = sub.add_parser("compile", help="compila una gramática BNF a un artefacto de tablas")
+    c.add_argument("grammar", help="archivo de gramática BNF")
+    c.add_argument("-o", "--output", required=True, help="archivo de tablas de salida")
+    c.add_argument("--timing", action="store_true", help="muestra tiempos por fase en stderr")
+    c.add_argument("--metrics", choices=("json", "prometheus"), help="métricas detalladas en stderr")
+    c.add_argument("--no-reduce", action="store_true", help="no quita símbolos inútiles ni alternativas duplicadas")
+    c.add_argument("--inline", action="store_true", help="sustituye los no terminales de un solo uso")
+    c.add_argument("--compare-states", action="store_true",
+                   help="construye también la gramática sin reducir y compara el número de estados")
+    c.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser("parse", help="analiza cadenas (una por línea) de archivos o stdin")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("-g", "--grammar", help="archivo de gramática BNF (se compila al vuelo)")
+    src.add_argument("-t", "--tables", help="artefacto creado con 'compile' (pickle: solo de confianza)")
+    p.add_argument("inputs", nargs="*", help="archivos de entrada ('-' o ninguno para stdin)")
+    p.add_argument("--json", action="store_true", help="un objeto JSON por cadena")
+    p.add_argument("-q", "--quiet", action="store_true", help="sin salida por cadena; solo el código de salida")
+    p.add_argument("--timing", action="store_true", help="muestra tiempos y tokens/s en stderr")
+    p.add_argument("--metrics", choices=("json", "prometheus"), help="métricas detalladas en stderr")
+    p.add_argument("--lazy", action="store_true",
+                   help="con -g, construye solo los estados que visitan las entradas")
+    p.add_argument("--max-rows", type=int, default=None, help="con --lazy, filas ACTION/GOTO en caché")
+    p.add_argument("--batch", type=int, default=0, metavar="N",
+                   help="reconoce las cadenas en lotes de N con NumPy (mismo veredicto y mensaje de error)")
+    p.add_argument("--parallel", action="store_true",
+                   help="parte las entradas largas en el terminal de sincronización (%%sync) y las analiza en paralelo")
+    p.add_argument("--sync", help="con --parallel, terminal de sincronización (si la gramática no tiene %%sync)")
+    p.add_argument("--chunk", help="con --parallel, no terminal de cada trozo entre dos terminales de sincronización")
+    p.add_argument("--workers", type=int, default=None, help="con --parallel, procesos del pool")
+    p.set_defaults(func=cmd_parse)
+
+    gn = sub.add_parser("generate", help="genera oraciones aleatorias de una gramática (una por línea)")
+    gn.add_argument("grammar", help="archivo de gramática BNF")
+    gn.add_argument("-n", "--count", type=int, default=100, help="número de oraciones")
+    gn.add_argument("--max-length", type=int, default=50, help="tokens máximos por oración")
+    gn.add_argument("--target-length", type=int, default=None,
+                    help="longitud orientativa (por defecto, al azar hasta --max-length)")
+    gn.add_argument("--seed", type=int, default=None)
+    gn.add_argument("--invalid", action="store_true", help="oraciones mutadas que el analizador rechaza")
+    gn.set_defaults(func=cmd_generate)
+
+    sv = sub.add_parser("serve", help="servicio de análisis por TCP (JSON por líneas)")
+    sv.add_argument("--host", default="127.0.0.1")
+    sv.add_argument("--port", type=int, default=8765)
+    sv.add_argument("--workers", type=int, default=None, help="procesos del pool (por defecto, uno por CPU)")
+    sv.add_argument("--max-grammars", type=int, default=32, help="gramáticas compiladas en el registro")
+    sv.add_argument("--max-batch", type=int, default=256, help="cadenas por lote enviado al pool")
+    sv.add_argument("--max-inflight", type=int, default=64, help="peticiones en curso antes de dejar de leer")
+    sv.set_defaults(func=cmd_serve)
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,145 @@
+"""
+Derivación por la derecha reconstruida a partir del resultado del análisis.
+
+El analizador devuelve la secuencia de reducciones y, para cada una, la
+posición de la entrada en que ocurrió (`positions`). Con eso basta: la
+forma sentencial tras la reducción t es la pila de símbolos en ese momento
+seguida de `tokens[positions[t]:]`. `Derivation` reproduce las reducciones
+una vez (O(n)) sobre una pila enlazada persistente: cada nodo guarda su
+símbolo, su padre y su profundidad, y cada reducción apunta al nodo tope.
+Las formas sentenciales se generan solo cuando se piden, completas o
+recortadas (`window`), sin construir nunca todas las cadenas intermedias.
+
+Los pasos se numeran en el orden de la derivación: el paso 0 es el símbolo
+inicial y el último es la cadena de tokens.
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .grammar import Grammar, Symbol
+
+Production = Tuple[Symbol, List[Symbol]]
+
+
+@dataclass
+class FormWindow:
+    """Forma sentencial recortada: `hidden_left` símbolos ocultos a la izquierda, etc."""
+    hidden_left: int
+    stack: List[Symbol]
+    input: List[Symbol]
+    hidden_right: int
+
+    def text(self, mark_top: bool = True) -> str:
+        parts: List[str] = []
+        if self.hidden_left:
+            parts.append(f"…(+{self.hidden_left})")
+        parts.extend(self.stack[:-1])
+        if self.stack:
+            parts.append(f"[{self.stack[-1]}]" if mark_top else self.stack[-1])
+        parts.extend(self.input)
+        if self.hidden_right:
+            parts.append(f"…(+{self.hidden_right})")
+        return " ".join(parts)
+
+
+class Derivation:
+    def __init__(self, tokens: Sequence[Symbol], reductions: Sequence[Production], positions: Sequence[int],
+                 start_symbol: Symbol):
+        if len(reductions) != len(positions):
+            raise ValueError("reductions y positions deben tener la misma longitud")
+        if tokens and tokens[-1] == Grammar.END_MARKER:
+            tokens = tokens[:-1]
+        self.tokens = tokens
+        self.reductions = reductions
+        self.positions = positions
+        self.start_symbol = start_symbol
+        self._symbols: Optional[List[Symbol]] = None
+        self._parent = array("i")
+        self._depth = array("i")
+        self._top = array("i")
+
+    @classmethod
+    def from_result(cls, result: dict, tokens: Sequence[Symbol], grammar: Grammar) -> "Derivation":
+        return cls(tokens, result['reductions'], result['positions'], grammar.start_symbol)
+
+    def __len__(self) -> int:
+        return len(self.reductions) + 1
+
+    def _build(self) -> None:
+        if self._symbols is not None:
+            return
+        symbols: List[Symbol] = []
+        parent, depth, top_of = self._parent, self._depth, self._top
+        tokens = self.tokens
+        top = -1
+        pos = 0
+
+        def push(sym: Symbol) -> int:
+            symbols.append(sym)
+            parent.append(top)
+            depth.append(depth[top] + 1 if top >= 0 else 1)
+            return len(symbols) - 1
+
+        for (head, body), target in zip(self.reductions, self.positions):
+            while pos < target:
+                top = push(tokens[pos])
+                pos += 1
+            k = 0 if body == [Grammar.EPSILON] else len(body)
+            for _ in range(k):
+                top = parent[top]
+            top = push(head)
+            top_of.append(top)
+        self._symbols = symbols
+
+    def _reduction_index(self, step: int) -> int:
+        if not 0 <= step < len(self):
+            raise IndexError(f"Paso fuera de rango: {step}")
+        # Paso 0 = tras la última reducción; último paso = tokens (índice -1)
+        return len(self.reductions) - 1 - step
+
+    def production(self, step: int) -> Optional[Production]:
+        """Producción aplicada para llegar al paso `step` (None en el paso 0)."""
+        r = self._reduction_index(step)
+        return None if step == 0 else self.reductions[r + 1]
+
+    def _stack(self, node: int, limit: Optional[int] = None) -> List[Symbol]:
+        out: List[Symbol] = []
+        while node >= 0 and (limit is None or len(out) < limit):
+            out.append(self._symbols[node])
+            node = self._parent[node]
+        out.reverse()
+        return out
+
+    def form(self, step: int) -> List[Symbol]:
+        """Forma sentencial completa del paso `step` (O(longitud de la forma))."""
+        r = self._reduction_index(step)
+        if r < 0:
+            return list(self.tokens)
+        self._build()
+        return self._stack(self._top[r]) + list(self.tokens[self.positions[r]:])
+
+    def window(self, step: int, left: int = 12, right: int = 12) -> FormWindow:
+        """
+        Forma del paso `step` recortada a los `left` símbolos más cercanos al
+        tope de la pila y los `right` primeros de la entrada restante. El
+        tope de la pila es el no terminal que se expande en el paso siguiente.
+        """
+        r = self._reduction_index(step)
+        if r < 0:
+            shown = list(self.tokens[:right])
+            return FormWindow(0, [], shown, len(self.tokens) - len(shown))
+        self._build()
+        node = self._top[r]
+        stack = self._stack(node, left)
+        pos = self.positions[r]
+        shown = list(self.tokens[pos:pos + right])
+        return FormWindow(self._depth[node] - len(stack), stack, shown, len(self.tokens) - pos - len(shown))
+
+    def steps(self, start: int = 0, stop: Optional[int] = None, left: int = 12,
+              right: int = 12) -> Iterator[Tuple[int, Optional[Production], FormWindow]]:
+        """(paso, producción aplicada, forma recortada) para los pasos [start, stop)."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for step in range(max(0, start), stop):
+            yield step, self.production(step), self.window(step, left, right)
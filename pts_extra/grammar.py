@@ -1,7 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Set, Tuple, Iterable
-import re
+from typing import Dict, List, Optional, Set, Tuple, Iterable
 
 Symbol = str
 Production = List[Symbol]
@@ -12,11 +11,33 @@ class Grammar:
     EPSILON: Symbol = "ε"
     END_MARKER: Symbol = "$"
 
-    def __init__(self, start_symbol: Symbol, productions: Productions):
+    def __init__(self, start_symbol: Symbol, productions: Productions, copy: bool = True):
+        """
+        Con `copy=False` la gramática usa `productions` tal cual, sin copiar
+        (el llamador no debe modificarlas después).
+        """
         self.start_symbol: Symbol = start_symbol
-        self.productions: Productions = {A: [list(p) for p in rhss] for A, rhss in productions.items()}
+        if copy:
+            productions = {A: [list(p) for p in rhss] for A, rhss in productions.items()}
+        self.productions: Productions = productions
         self.nonterminals: Set[Symbol] = set(self.productions.keys())
         self.terminals: Set[Symbol] = self._infer_terminals()
+        # Posición en el fuente de cada alternativa: spans[A][i] (ver loader)
+        self.spans: Dict[Symbol, list] = {}
+        self.source: Optional[str] = None
+        # (terminal de sincronización, no terminal de cada trozo), de `%sync`; ver `parallel`
+        self.sync: Optional[Tuple[Symbol, Symbol]] = None
+
+    def span(self, head: Symbol, body: List[Symbol]):
+        """Posición en el fuente de la producción `head -> body`, o None."""
+        spans = self.spans.get(head)
+        if not spans:
+            return None
+        target = [X for X in body if X != self.EPSILON]
+        for alt, span in zip(self.productions[head], spans):
+            if [X for X in alt if X != self.EPSILON] == target:
+                return span
+        return None
 
     def _infer_terminals(self) -> Set[Symbol]:
         terms: Set[Symbol] = set()
@@ -33,46 +54,19 @@ class Grammar:
         aug_start = self.start_symbol + "'"
         while aug_start in self.nonterminals or aug_start in self.terminals:
             aug_start += "'"
-        prods: Productions = {A: [p[:] for p in rhss] for A, rhss in self.productions.items()}
+        prods: Productions = dict(self.productions)
         prods[aug_start] = [[self.start_symbol]]
-        return Grammar(aug_start, prods)
-
-    @staticmethod
-    def _tok(rhs: str) -> List[Symbol]:
-        tokens = re.findall(r"'[^']*'|\"[^\"]*\"|[^\s]+", rhs)
-        out: List[Symbol] = []
-        for t in tokens:
-            if t.startswith("'") and t.endswith("'"):
-                out.append(t[1:-1])
-            elif t.startswith('"') and t.endswith('"'):
-                out.append(t[1:-1])
-            else:
-                out.append(t)
-        return out
+        aug = Grammar(aug_start, prods)
+        aug.spans = self.spans
+        aug.source = self.source
+        aug.sync = self.sync
+        return aug
 
     @classmethod
-    def parse_bnf(cls, text: str) -> "Grammar":
-        lines = [ln.strip() for ln in text.splitlines()]
-        pairs = []
-        nts: Set[Symbol] = set()
-        for ln in lines:
-            if not ln or ln.startswith('#'):
-                continue
-            if '->' not in ln:
-                raise ValueError(f"Línea inválida, falta '->': {ln}")
-            lhs, rhs = ln.split('->', 1)
-            A = lhs.strip()
-            nts.add(A)
-            pairs.append((A, rhs.strip()))
-        if not pairs:
-            raise ValueError('Gramática vacía')
-        start = pairs[0][0]
-        prods: Productions = {A: [] for A in nts}
-        for A, rhs in pairs:
-            for alt in [a.strip() for a in rhs.split('|')]:
-                toks = [cls.EPSILON if t in (cls.EPSILON, 'epsilon', 'EPSILON') else t for t in cls._tok(alt)]
-                prods[A].append(toks)
-        return Grammar(start, prods)
+    def parse_bnf(cls, text: str, source: Optional[str] = None) -> "Grammar":
+        """Lee una gramática BNF de un texto; ver `loader` para el formato."""
+        from .loader import load_grammar_text
+        return load_grammar_text(text, source)
 
     def compute_first(self) -> Dict[Symbol, Set[Symbol]]:
         first: Dict[Symbol, Set[Symbol]] = {}
@@ -0,0 +1,103 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .grammar import Grammar, Symbol
+from .lr1 import LR1Builder, LR1Item
+
+
+@dataclass(frozen=True)
+class ItemNode:
+    id: int
+    state: int
+    item: LR1Item
+
+    def label(self) -> str:
+        rhs = list(self.item.body)
+        rhs.insert(self.item.dot, "•")
+        return f"{self.item.head} → {' '.join(rhs)}\n{{{self.item.lookahead}}}"
+
+
+@dataclass(frozen=True)
+class ItemEdge:
+    src: int
+    dst: int
+    label: Symbol
+    epsilon: bool = False
+
+
+@dataclass
+class ItemGraph:
+    """
+    AFN de items LR(1) como estructura plana de nodos y aristas,
+    independiente de Graphviz.
+    """
+    nodes: List[ItemNode] = field(default_factory=list)
+    edges: List[ItemEdge] = field(default_factory=list)
+    # Items que no se incluyeron por `max_items`
+    omitted: int = 0
+
+
+def _item_key(item: LR1Item):
+    return (item.head, item.body, item.dot, item.lookahead)
+
+
+def build_item_graph(builder: LR1Builder, states: Optional[Iterable[int]] = None,
+                     max_items: Optional[int] = None) -> ItemGraph:
+    """
+    Construye el AFN de items a partir del autómata canónico del builder.
+
+    Los items se indexan por (estado, item) y por (estado, siguiente símbolo),
+    de modo que cada arista se obtiene con búsquedas en diccionario: el coste
+    es lineal en el número de items más el número de aristas. Con `states`
+    solo se incluyen los items de esos estados, y con `max_items` como mucho
+    ese número de items (los demás se cuentan en `omitted`).
+    """
+    graph = ItemGraph()
+    node_ids: Dict[Tuple[int, LR1Item], int] = {}
+    by_next: Dict[Tuple[int, Symbol], List[LR1Item]] = {}
+    state_ids = range(len(builder.states)) if states is None else sorted(set(states))
+
+    for state_id in state_ids:
+        if max_items is not None and len(graph.nodes) >= max_items:
+            graph.omitted += len(builder.states[state_id])
+            continue
+        items = sorted(builder.states[state_id], key=_item_key)
+        if max_items is not None and len(graph.nodes) + len(items) > max_items:
+            cut = max_items - len(graph.nodes)
+            graph.omitted += len(items) - cut
+            items = items[:cut]
+        for item in items:
+            node_id = len(graph.nodes)
+            node_ids[(state_id, item)] = node_id
+            graph.nodes.append(ItemNode(node_id, state_id, item))
+            X = item.next_symbol()
+            if X is not None:
+                by_next.setdefault((state_id, X), []).append(item)
+
+    # Transiciones por símbolo: [A -> α • X β, a] --X--> [A -> α X • β, a]
+    for (src_state, symbol), dst_state in builder.transitions.items():
+        for item in by_next.get((src_state, symbol), ()):
+            # Con un subconjunto de estados, el destino puede no estar en el grafo
+            dst = node_ids.get((dst_state, item.advance()))
+            if dst is not None:
+                graph.edges.append(ItemEdge(node_ids[(src_state, item)], dst, symbol))
+
+    # Transiciones ε del cierre: [A -> α • B β, a] --ε--> [B -> • γ, b], b ∈ FIRST(β a)
+    aug = builder.aug
+    for node in list(graph.nodes):
+        state_id, item = node.state, node.item
+        B = item.next_symbol()
+        if B is None or B not in aug.nonterminals:
+            continue
+        lookaheads = aug.first_of_sequence(item.body[item.dot + 1:], builder.first)
+        if Grammar.EPSILON in lookaheads:
+            lookaheads = (lookaheads - {Grammar.EPSILON}) | {item.lookahead}
+        for prod in aug.productions[B]:
+            body = tuple(prod) if prod != [Grammar.EPSILON] else ()
+            for b in sorted(lookaheads):
+                dst = node_ids.get((state_id, LR1Item(B, body, 0, b)))
+                if dst is not None:
+                    graph.edges.append(ItemEdge(node.id, dst, Grammar.EPSILON, epsilon=True))
+
+    return graph
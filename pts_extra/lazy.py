@@ -0,0 +1,189 @@
+"""
+Autómata LR(1) perezoso: los estados se construyen cuando el analizador
+los visita por primera vez, como en un AFD perezoso.
+
+Un estado se identifica por su núcleo (los ítems con el punto avanzado, más
+el ítem inicial): en LR(1) canónico el cierre queda determinado por el
+núcleo, así que dos núcleos distintos son dos estados distintos. Al pedir la
+fila ACTION/GOTO de un estado se calcula el cierre de su núcleo, se agrupan
+los ítems por el símbolo siguiente para obtener los núcleos sucesores (que
+solo se numeran, sin cerrarlos) y se rellena la fila. El tiempo hasta el
+primer análisis depende de los estados que toca la entrada, no del tamaño
+del autómata.
+
+Los núcleos se guardan siempre, porque los números de estado deben ser
+estables; las filas, que son lo que ocupa, pueden limitarse con
+`max_rows`: las menos usadas se descartan y se reconstruyen si se vuelven a
+visitar. Los números de estado no coinciden con los de `LR1Builder`, y
+los conflictos solo se detectan en los estados visitados: al construir una
+fila con conflictos se lanza `LazyConflictError` y el análisis se detiene
+(la gramática no es LR(1), así que el resultado no sería fiable).
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .grammar import Grammar, Symbol
+from .lr1 import LR1Builder, LR1Item
+from .parser import ActionValue, LR1Parser
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+Kernel = FrozenSet[LR1Item]
+Row = Tuple[Dict[Symbol, ActionValue], Dict[Symbol, int]]
+
+
+class LazyConflictError(ValueError):
+    """Un estado visitado tiene conflictos; están en `conflicts`."""
+
+    def __init__(self, state: int, conflicts: List[str]):
+        self.state = state
+        self.conflicts = conflicts
+        super().__init__(f"La gramática tiene {len(conflicts)} conflicto(s) y no es LR(1)")
+
+
+class LazyLR1Automaton:
+    def __init__(self, grammar: Grammar, max_rows: Optional[int] = None, metrics: Optional["Metrics"] = None):
+        if max_rows is not None and max_rows < 1:
+            raise ValueError("max_rows debe ser al menos 1")
+        self.grammar = grammar
+        self.max_rows = max_rows
+        self.metrics = metrics
+        # El builder aporta la gramática aumentada, FIRST y closure; no construye nada más
+        self._builder = LR1Builder(grammar, metrics)
+        aug = self._builder.aug
+        self.aug = aug
+        start_item = LR1Item(aug.start_symbol, (grammar.start_symbol,), 0, Grammar.END_MARKER)
+        self.kernels: List[Kernel] = [frozenset((start_item,))]
+        self._index: Dict[Kernel, int] = {self.kernels[0]: 0}
+        self._rows: "OrderedDict[int, Row]" = OrderedDict()
+        self._checked: Set[int] = set()
+        self.conflicts: List[str] = []
+        self.row_builds = 0
+        self.evictions = 0
+        if metrics is not None:
+            metrics.count("states")
+
+    @property
+    def n_states(self) -> int:
+        """Estados descubiertos hasta ahora (no todos tienen fila construida)."""
+        return len(self.kernels)
+
+    @property
+    def closure_calls(self) -> int:
+        return self._builder.closure_calls
+
+    def row(self, state: int) -> Row:
+        """
+        Fila (ACTION, GOTO) de `state`, construyéndola si no está en caché.
+        LazyConflictError si el estado tiene conflictos.
+        """
+        rows = self._rows
+        row = rows.get(state)
+        if row is not None:
+            rows.move_to_end(state)
+            return row
+        m = self.metrics
+        if m is None:
+            row = self._build_row(state)
+        else:
+            with m.phase("lazy_rows"):
+                row = self._build_row(state)
+        rows[state] = row
+        if self.max_rows is not None and len(rows) > self.max_rows:
+            rows.popitem(last=False)
+            self.evictions += 1
+            if m is not None:
+                m.count("row_evictions")
+        return row
+
+    def _state_for(self, kernel: Kernel) -> int:
+        j = self._index.get(kernel)
+        if j is None:
+            j = len(self.kernels)
+            self._index[kernel] = j
+            self.kernels.append(kernel)
+            if self.metrics is not None:
+                self.metrics.count("states")
+        return j
+
+    def _build_row(self, state: int) -> Row:
+        self.row_builds += 1
+        if self.metrics is not None:
+            self.metrics.count("row_builds")
+        items = self._builder.closure(self.kernels[state])
+        successors: Dict[Symbol, List[LR1Item]] = {}
+        reductions: List[LR1Item] = []
+        for it in items:
+            X = it.next_symbol()
+            if X is None:
+                reductions.append(it)
+            else:
+                successors.setdefault(X, []).append(it.advance())
+
+        action: Dict[Symbol, ActionValue] = {}
+        goto: Dict[Symbol, int] = {}
+        # Mismo orden que LR1Builder._fill_tables: desplazamientos antes que reducciones
+        report = state not in self._checked
+        self._checked.add(state)
+        conflicted = False
+        for X, advanced in successors.items():
+            j = self._state_for(frozenset(advanced))
+            if X in self.aug.nonterminals:
+                goto[X] = j
+            else:
+                action[X] = ('s', j)
+        for it in reductions:
+            if it.head == self.aug.start_symbol:
+                value: ActionValue = ('acc',)
+            else:
+                value = ('r', (it.head, list(it.body)))
+            existing = action.get(it.lookahead)
+            if existing is None:
+                action[it.lookahead] = value
+            elif existing != value:
+                conflicted = True
+                if report:
+                    self._conflict(state, it.lookahead, existing, value)
+        if conflicted:
+            # La fila no se guarda: volver a visitar el estado vuelve a fallar
+            raise LazyConflictError(state, self.conflicts)
+        return action, goto
+
+    def _conflict(self, state: int, terminal: Symbol, existing: ActionValue, value: ActionValue) -> None:
+        where = ", ".join(w for w in (self._builder._where(existing), self._builder._where(value)) if w)
+        suffix = f" ({where})" if where else ""
+        self.conflicts.append(f"Conflicto en estado {state}, terminal '{terminal}': {existing} vs {value}{suffix}")
+        if self.metrics is not None:
+            self.metrics.count("conflicts")
+
+    def parser(self, metrics: Optional["Metrics"] = None) -> LR1Parser:
+        """`LR1Parser` que pide las filas al autómata según las visita."""
+        return LR1Parser(self.grammar, LazyActionMap(self), LazyGotoMap(self), metrics)
+
+
+class LazyActionMap:
+    """Vista con la interfaz `get((estado, terminal))` de `LR1Builder.action`."""
+
+    def __init__(self, automaton: LazyLR1Automaton):
+        self._automaton = automaton
+
+    def get(self, key: Tuple[int, Symbol], default=None) -> Optional[ActionValue]:
+        s, a = key
+        if not 0 <= s < self._automaton.n_states:
+            return default
+        return self._automaton.row(s)[0].get(a, default)
+
+
+class LazyGotoMap:
+    """Vista con la interfaz `get((estado, no terminal))` de `LR1Builder.goto_table`."""
+
+    def __init__(self, automaton: LazyLR1Automaton):
+        self._automaton = automaton
+
+    def get(self, key: Tuple[int, Symbol], default=None) -> Optional[int]:
+        s, A = key
+        if not 0 <= s < self._automaton.n_states:
+            return default
+        return self._automaton.row(s)[1].get(A, default)
@@ -0,0 +1,179 @@
+"""
+Lector de gramáticas BNF por líneas.
+
+Lee de un archivo (línea a línea o con mmap), de cualquier iterable de
+líneas o de un texto, sin cargar ni partir todo el contenido de una vez.
+Los símbolos se internan al leerlos, así cada aparición de un mismo
+símbolo es el mismo objeto, y la `Grammar` se construye una sola vez sin
+copiar las producciones. Para cada producción se guarda su posición en el
+fuente (`Grammar.spans`), que usan los mensajes de error y de conflictos.
+
+Formato (el mismo que `Grammar.parse_bnf`): una regla por línea,
+`A -> α | β`, líneas vacías y comentarios `#` ignorados, terminales entre
+comillas simples o dobles, y `ε`/`epsilon`/`EPSILON` para la cadena vacía.
+Un `|` entre comillas es parte del terminal y no separa alternativas.
+
+La directiva `%sync t N` declara un terminal de sincronización `t` y el no
+terminal `N` de los trozos entre dos `t` (ver `parallel`); puede ir en
+cualquier línea.
+"""
+from __future__ import annotations
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import io
+import mmap
+import os
+import re
+import sys
+
+from .grammar import Grammar, Production, Symbol
+
+_EPSILON_SPELLINGS = frozenset((Grammar.EPSILON, "epsilon", "EPSILON"))
+_TOKEN = re.compile(r"'[^']*'|\"[^\"]*\"|[^\s]+")
+
+
+class SourceSpan(NamedTuple):
+    """Posición de una alternativa en el fuente (línea y columna, desde 1)."""
+    line: int
+    column: int
+
+
+class GrammarSyntaxError(ValueError):
+    def __init__(self, message: str, line: int, source: Optional[str] = None):
+        self.line = line
+        self.source = source
+        where = f"{source}:{line}" if source else f"línea {line}"
+        super().__init__(f"{where}: {message}")
+
+
+def _split_alternatives(rhs: str) -> Iterator[Tuple[int, str]]:
+    """(desplazamiento, texto) de cada alternativa; los `|` entre comillas no cuentan."""
+    if "'" not in rhs and '"' not in rhs:
+        offset = 0
+        for alt in rhs.split('|'):
+            yield offset, alt
+            offset += len(alt) + 1
+        return
+    start = 0
+    quote = None
+    for i, ch in enumerate(rhs):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == '|':
+            yield start, rhs[start:i]
+            start = i + 1
+    yield start, rhs[start:]
+
+
+def _tokens(alt: str) -> List[str]:
+    if "'" not in alt and '"' not in alt:
+        return alt.split()
+    out = []
+    for t in _TOKEN.findall(alt):
+        if len(t) >= 2 and t[0] == t[-1] and t[0] in "'\"":
+            t = t[1:-1]
+        out.append(t)
+    return out
+
+
+def parse_lines(lines: Iterable[str], source: Optional[str] = None) -> Grammar:
+    """Construye la gramática a partir de un iterable de líneas."""
+    # Tabla de símbolos: cada texto se interna una vez; las grafías de ε ya están
+    symbols: Dict[str, Symbol] = {t: Grammar.EPSILON for t in _EPSILON_SPELLINGS}
+    lookup = symbols.get
+
+    def intern(t: str) -> Symbol:
+        sym = symbols[t] = sys.intern(t)
+        return sym
+
+    productions: Dict[Symbol, List[Production]] = {}
+    spans: Dict[Symbol, List[SourceSpan]] = {}
+    start: Optional[Symbol] = None
+    sync: Optional[Tuple[Symbol, Symbol, int]] = None
+    for lineno, raw in enumerate(lines, start=1):
+        ln = raw.strip()
+        if not ln or ln[0] == '#':
+            continue
+        if ln[0] == '%':
+            sync = _directive(ln, lineno, source)
+            continue
+        arrow = ln.find('->')
+        if arrow < 0:
+            raise GrammarSyntaxError(f"Línea inválida, falta '->': {ln}", lineno, source)
+        head = ln[:arrow].strip()
+        if not head:
+            raise GrammarSyntaxError(f"Falta el no terminal antes de '->': {ln}", lineno, source)
+        head = lookup(head) or intern(head)
+        if start is None:
+            start = head
+        bodies = productions.get(head)
+        if bodies is None:
+            bodies = productions[head] = []
+            spans[head] = []
+        head_spans = spans[head]
+        # Columna de la parte derecha dentro de la línea original
+        rhs_column = len(raw) - len(raw.lstrip()) + arrow + 2
+        for offset, alt in _split_alternatives(ln[arrow + 2:]):
+            body = [lookup(t) or intern(t) for t in _tokens(alt)]
+            bodies.append(body)
+            skipped = len(alt) - len(alt.lstrip())
+            head_spans.append(SourceSpan(lineno, rhs_column + offset + skipped + 1))
+    if start is None:
+        raise ValueError('Gramática vacía')
+    grammar = Grammar(start, productions, copy=False)
+    grammar.spans = spans
+    grammar.source = source
+    if sync is not None:
+        terminal, chunk, lineno = sync
+        if terminal not in grammar.terminals:
+            raise GrammarSyntaxError(f"%sync: '{terminal}' no es un terminal de la gramática", lineno, source)
+        if chunk not in grammar.nonterminals:
+            raise GrammarSyntaxError(f"%sync: '{chunk}' no es un no terminal de la gramática", lineno, source)
+        grammar.sync = (sys.intern(terminal), sys.intern(chunk))
+    return grammar
+
+
+def _directive(ln: str, lineno: int, source: Optional[str]) -> Tuple[Symbol, Symbol, int]:
+    parts = _tokens(ln)
+    if parts[0] != '%sync':
+        raise GrammarSyntaxError(f"Directiva desconocida: {parts[0]}", lineno, source)
+    if len(parts) != 3:
+        raise GrammarSyntaxError(f"Uso: %sync <terminal> <no terminal>: {ln}", lineno, source)
+    return parts[1], parts[2], lineno
+
+
+def _mmap_lines(fh: IO[bytes], encoding: str) -> Iterator[str]:
+    try:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # archivo vacío
+        return
+    with mm:
+        for line in iter(mm.readline, b""):
+            yield line.decode(encoding)
+
+
+def load_grammar(source: Union[str, os.PathLike, IO], use_mmap: bool = False, encoding: str = "utf-8") -> Grammar:
+    """
+    Carga una gramática desde una ruta o un archivo abierto, línea a línea.
+    Con `use_mmap=True` (solo rutas) el archivo se mapea en memoria y las
+    líneas se decodifican de una en una.
+    """
+    if hasattr(source, "read"):
+        name = getattr(source, "name", None)
+        lines: Iterable = source
+        if isinstance(source, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(source, "mode", ""):
+            lines = (line.decode(encoding) for line in source)
+        return parse_lines(lines, str(name) if name is not None else None)
+    path = os.fspath(source)
+    if use_mmap:
+        with open(path, "rb") as fh:
+            return parse_lines(_mmap_lines(fh, encoding), path)
+    with open(path, encoding=encoding) as fh:
+        return parse_lines(fh, path)
+
+
+def load_grammar_text(text: str, source: Optional[str] = None) -> Grammar:
+    """Como `load_grammar` pero desde un texto; no parte el texto en una lista de líneas."""
+    return parse_lines(io.StringIO(text), source)
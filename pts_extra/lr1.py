@@ -1,9 +1,13 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Set, Tuple, Iterable, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Set, Tuple, Iterable, Optional
+import time
 
 from .grammar import Grammar, Symbol
 
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
 
 @dataclass(frozen=True)
 class LR1Item:
@@ -30,18 +34,31 @@ class LR1Item:
 
 
 class LR1Builder:
-    def __init__(self, grammar: Grammar):
+    def __init__(self, grammar: Grammar, metrics: Optional["Metrics"] = None):
         self.grammar = grammar
+        self.metrics = metrics
         self.aug = grammar.augmented()
-        self.first = self.aug.compute_first()
+        if metrics is None:
+            self.first = self.aug.compute_first()
+        else:
+            with metrics.phase("first"):
+                self.first = self.aug.compute_first()
         self.states: List[Set[LR1Item]] = []
         self.transitions: Dict[Tuple[int, Symbol], int] = {}
         self.action: Dict[Tuple[int, Symbol], Tuple] = {}
         self.goto_table: Dict[Tuple[int, Symbol], int] = {}
         self.conflicts: List[str] = []
+        self.closure_calls = 0
 
     def closure(self, items: Iterable[LR1Item]) -> Set[LR1Item]:
+        self.closure_calls += 1
+        m = self.metrics
+        if m is not None:
+            start = time.perf_counter()
+            first_time = 0.0
+            first_calls = 0
         I: Set[LR1Item] = set(items)
+        kernel = len(I)
         changed = True
         while changed:
             changed = False
@@ -50,7 +67,13 @@ class LR1Builder:
                 X = it.next_symbol()
                 if X and X in self.aug.nonterminals:
                     beta = list(it.body[it.dot + 1 :])
-                    lookaheads = self.aug.first_of_sequence(beta, self.first)
+                    if m is None:
+                        lookaheads = self.aug.first_of_sequence(beta, self.first)
+                    else:
+                        t = time.perf_counter()
+                        lookaheads = self.aug.first_of_sequence(beta, self.first)
+                        first_time += time.perf_counter() - t
+                        first_calls += 1
                     if Grammar.EPSILON in lookaheads:
                         lookaheads = (lookaheads - {Grammar.EPSILON}) | {it.lookahead}
                     for prod in self.aug.productions[X]:
@@ -61,6 +84,10 @@ class LR1Builder:
                 if ni not in I:
                     I.add(ni)
                     changed = True
+        if m is not None:
+            m.add_time("closure", time.perf_counter() - start)
+            m.add_time("first_of_sequence", first_time, first_calls)
+            m.count("items_created", len(I) - kernel)
         return I
 
     def goto_set(self, I: Set[LR1Item], X: Symbol) -> Set[LR1Item]:
@@ -69,7 +96,13 @@ class LR1Builder:
             return set()
         return self.closure(advanced)
 
-    def build_canonical_collection(self):
+    def build_canonical_collection(self, progress: Optional[Callable[[int, int, int], None]] = None):
+        """
+        Construye la colección canónica. Si se da `progress`, se llama tras
+        procesar cada estado con (estados descubiertos, tamaño de la worklist,
+        llamadas a closure).
+        """
+        m = self.metrics
         start_item = LR1Item(self.aug.start_symbol, (self.aug.productions[self.aug.start_symbol][0][0],), 0, Grammar.END_MARKER)
         I0 = self.closure([start_item])
         C: List[Set[LR1Item]] = []
@@ -85,18 +118,40 @@ class LR1Builder:
                 goto_set = self.goto_set(I, X)
                 if not goto_set:
                     continue
+                if m is not None:
+                    t = time.perf_counter()
                 fr = frozenset(goto_set)
-                if fr not in state_index:
+                j = state_index.get(fr)
+                if j is None:
                     j = len(self.states)
                     state_index[fr] = j
                     self.states.append(goto_set)
                     worklist.append(j)
-                else:
-                    j = state_index[fr]
+                if m is not None:
+                    m.add_time("state_hashing", time.perf_counter() - t)
                 self.transitions[(i, X)] = j
+            if progress is not None:
+                progress(len(self.states), len(worklist), self.closure_calls)
 
-    def build_tables(self):
-        self.build_canonical_collection()
+    def build_tables(self, progress: Optional[Callable[[int, int, int], None]] = None):
+        m = self.metrics
+        if m is None:
+            self.build_canonical_collection(progress)
+            self._fill_tables()
+            return
+        with m.track_memory():
+            with m.phase("canonical_collection"):
+                self.build_canonical_collection(progress)
+            with m.phase("tables"):
+                self._fill_tables()
+        m.count("closure_calls", self.closure_calls)
+        m.count("states", len(self.states))
+        m.count("transitions", len(self.transitions))
+        m.count("action_entries", len(self.action))
+        m.count("goto_entries", len(self.goto_table))
+        m.count("conflicts", len(self.conflicts))
+
+    def _fill_tables(self):
         self.action = {}
         self.goto_table = {}
         self.conflicts = []
@@ -120,12 +175,29 @@ class LR1Builder:
                     self.goto_table[(i, A)] = j
 
     def _set_action(self, state: int, terminal: Symbol, value: Tuple):
+        m = self.metrics
+        if m is not None:
+            start = time.perf_counter()
         key = (state, terminal)
         existing = self.action.get(key)
         if existing and existing != value:
-            self.conflicts.append(f"Conflicto en estado {state}, terminal '{terminal}': {existing} vs {value}")
+            where = ", ".join(w for w in (self._where(existing), self._where(value)) if w)
+            suffix = f" ({where})" if where else ""
+            self.conflicts.append(f"Conflicto en estado {state}, terminal '{terminal}': {existing} vs {value}{suffix}")
         else:
             self.action[key] = value
+        if m is not None:
+            m.add_time("conflict_detection", time.perf_counter() - start)
+
+    def _where(self, value: Tuple) -> str:
+        # Línea del fuente de la producción de una reducción, si se conoce
+        if value[0] != 'r':
+            return ""
+        head, body = value[1]
+        span = self.grammar.span(head, body)
+        if span is None:
+            return ""
+        return f"{head} -> {' '.join(body) or Grammar.EPSILON}: línea {span.line}"
 
     def summary(self) -> str:
         lines: List[str] = []
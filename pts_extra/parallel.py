@@ -0,0 +1,294 @@
+"""
+Análisis en paralelo de entradas muy largas que son una sucesión de
+elementos separados por un terminal de sincronización (sentencias
+separadas por `;`, elementos de una lista separados por `,`...).
+
+La gramática declara el terminal `t` y el no terminal `N` de cada
+elemento con `%sync t N` (o se pasan como `sync=` y `chunk=`):
+
+1. La entrada se parte en cada `t`; cada trozo se analiza como una cadena
+   de la subgramática de `N` (las producciones alcanzables desde `N`) en
+   un pool de procesos. Los trozos que no son un `N` (el primero de
+   `[ id , id ]`, o los que parten una estructura anidada) se ignoran.
+2. Un último análisis secuencial recorre la entrada con las tablas
+   completas: al ir a desplazar el primer token de un trozo analizado, si
+   GOTO[s, N] existe se apilan N y sus reducciones de una vez y se salta
+   al final del trozo; si no, se sigue token a token.
+
+Si ese recorrido acepta, el árbol que forma (exterior más los subárboles de
+los trozos) es un árbol de derivación válido, y como una gramática LR(1)
+sin conflictos no es ambigua es el mismo árbol que da el análisis
+secuencial: las reducciones y sus posiciones son idénticas. Ante cualquier
+fallo (error, trozos que no encajan, subgramática con conflictos) se
+repite el análisis secuencial completo, que además da el mensaje de error
+exacto.
+"""
+from __future__ import annotations
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+import multiprocessing as mp
+import time
+
+from .grammar import Grammar, Symbol
+from .lr1 import LR1Builder
+from .parser import ActionValue, LR1Parser
+from .pipeline import TableArtifact
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+Production = Tuple[Symbol, List[Symbol]]
+
+# ---------------- Lado del worker -----------------
+
+_worker_parser: Optional[LR1Parser] = None
+# id() de cada lista de cuerpo de las acciones de reducción → id de producción
+_worker_ids: Dict[int, int] = {}
+
+
+def _init_worker(grammar: Grammar, action: Dict[Tuple[int, Symbol], ActionValue],
+                 goto: Dict[Tuple[int, Symbol], int], productions: List[Production]) -> None:
+    global _worker_parser, _worker_ids
+    _worker_parser = LR1Parser(grammar, action, goto)
+    by_value = {(head, tuple(body)): i for i, (head, body) in enumerate(productions)}
+    # Las reducciones del resultado comparten la lista del cuerpo con la acción (que vive en `action`)
+    _worker_ids = {id(act[1][1]): by_value[(act[1][0], tuple(act[1][1]))]
+                   for act in action.values() if act[0] == 'r'}
+
+
+def _parse_segments(offset: int, tokens: List[Symbol], bounds: array) -> Tuple[array, array, array, array]:
+    """
+    Analiza los trozos `tokens[bounds[2i]:bounds[2i+1]]` de una tarea. Para
+    los que son un `N` devuelve su inicio y su número de reducciones, y
+    todas sus reducciones (ids de producción) y posiciones (absolutas)
+    concatenadas; así el resultado son cuatro arrays planos.
+    """
+    starts, counts, ids, positions = array('q'), array('q'), array('i'), array('q')
+    parse = _worker_parser.parse
+    for k in range(0, len(bounds), 2):
+        a, b = bounds[k], bounds[k + 1]
+        result = parse(tokens[a:b], trace=False)
+        if not result['accepted']:
+            continue
+        starts.append(offset + a)
+        counts.append(len(result['reductions']))
+        ids.extend(_worker_ids[id(body)] for _, body in result['reductions'])
+        base = offset + a
+        positions.extend(base + p for p in result['positions'])
+    return starts, counts, ids, positions
+
+
+# ---------------- Lado del llamador -----------------
+
+def chunk_grammar(grammar: Grammar, chunk: Symbol) -> Grammar:
+    """Subgramática con inicio `chunk` y las producciones alcanzables desde él."""
+    reachable = {chunk}
+    stack = [chunk]
+    while stack:
+        for body in grammar.productions[stack.pop()]:
+            for X in body:
+                if X in grammar.nonterminals and X not in reachable:
+                    reachable.add(X)
+                    stack.append(X)
+    sub = Grammar(chunk, {A: grammar.productions[A] for A in grammar.productions if A in reachable}, copy=False)
+    sub.spans = grammar.spans
+    sub.source = grammar.source
+    return sub
+
+
+class ParallelParser:
+    """
+    Analizador de una tabla completa (`TableArtifact`) que reparte las
+    entradas largas entre `workers` procesos. Las entradas de menos de
+    `min_tokens` tokens se analizan directamente; cada tarea del pool lleva
+    trozos por unos `task_tokens` tokens. El pool se crea en el primer
+    análisis en paralelo; hay que cerrarlo con `close()` (o usar `with`).
+    Con `metrics` se registran los mismos contadores que en `LR1Parser`,
+    más `parallel_parses` (análisis resueltos con los trozos).
+    """
+
+    def __init__(self, artifact: TableArtifact, sync: Optional[Symbol] = None, chunk: Optional[Symbol] = None,
+                 workers: Optional[int] = None, min_tokens: int = 100_000, task_tokens: int = 20_000,
+                 executor: Optional[Executor] = None, metrics: Optional["Metrics"] = None):
+        if artifact.conflicts:
+            raise ValueError(f"La gramática tiene {len(artifact.conflicts)} conflicto(s) y no es LR(1)")
+        grammar = artifact.grammar
+        # Los artefactos guardados antes de `%sync` no tienen el atributo
+        declared = getattr(grammar, "sync", None) or (None, None)
+        self.sync = sync or declared[0]
+        self.chunk = chunk or declared[1]
+        if self.sync is None or self.chunk is None:
+            raise ValueError("Falta el terminal de sincronización y el no terminal de los trozos (%sync t N)")
+        if self.sync not in grammar.terminals:
+            raise ValueError(f"'{self.sync}' no es un terminal de la gramática")
+        if self.chunk not in grammar.nonterminals:
+            raise ValueError(f"'{self.chunk}' no es un no terminal de la gramática")
+        self.parser = artifact.parser()
+        self.metrics = metrics
+        self.workers = workers
+        self.min_tokens = min_tokens
+        self.task_tokens = task_tokens
+        self._executor = executor
+        self._owns_executor = executor is None
+
+        sub = chunk_grammar(grammar, self.chunk)
+        builder = LR1Builder(sub)
+        builder.build_tables()
+        # Si los trozos no son LR(1) por sí solos se analiza siempre en secuencial
+        self.chunk_conflicts = list(builder.conflicts)
+        self._productions: List[Production] = [
+            (A, [X for X in body if X != Grammar.EPSILON]) for A, bodies in sub.productions.items() for body in bodies
+        ]
+        self._initargs = (sub, builder.action, builder.goto_table, self._productions)
+        self.last_stats: Dict[str, object] = {}
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"),
+                                                 initializer=_init_worker, initargs=self._initargs)
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown()
+        self._executor = None
+
+    def __enter__(self) -> "ParallelParser":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def parse(self, tokens: Sequence[Symbol], trace: bool = False) -> dict:
+        """
+        Mismo resultado que `LR1Parser.parse(tokens, trace=False)`. Con
+        `trace=True` se analiza en secuencial, porque los pasos no se pueden
+        reconstruir a partir de los trozos.
+        """
+        m = self.metrics
+        if m is None:
+            return self._parse(tokens, trace)
+        with m.track_memory():
+            start = time.perf_counter()
+            result = self._parse(tokens, trace)
+            m.add_time("parse", time.perf_counter() - start)
+        m.count("parses")
+        m.count("parallel_parses", int(self.last_stats["parallel"]))
+        m.count("accepted", int(result['accepted']))
+        m.count("tokens", self.last_stats["tokens"])
+        m.count("shifts", result['position'])
+        m.count("reductions", len(result['reductions']))
+        if m.timings["parse"] > 0:
+            m.set("tokens_per_second", m.counters["tokens"] / m.timings["parse"])
+        return result
+
+    def _parse(self, tokens: Sequence[Symbol], trace: bool) -> dict:
+        tokens = list(tokens)
+        if tokens and tokens[-1] == Grammar.END_MARKER:
+            tokens.pop()
+        self.last_stats = {"tokens": len(tokens), "parallel": False}
+        if trace or len(tokens) < self.min_tokens or self.chunk_conflicts:
+            return self.parser.parse(tokens, trace=trace)
+
+        segments = self._segments(tokens)
+        if not segments:
+            return self.parser.parse(tokens, trace=False)
+        # Tareas de unos `task_tokens` tokens: (desplazamiento, tokens, límites relativos)
+        tasks: List[Tuple[int, List[Symbol], array]] = []
+        ends: Dict[int, int] = {}
+        i = 0
+        while i < len(segments):
+            first = segments[i][0]
+            bounds = array('q')
+            while i < len(segments) and (not bounds or segments[i][1] - first <= self.task_tokens):
+                a, b = segments[i]
+                bounds.extend((a - first, b - first))
+                ends[a] = b
+                i += 1
+            tasks.append((first, tokens[first:segments[i - 1][1]], bounds))
+        # chunks[inicio] = (fin, primera reducción, última + 1) en all_ids/all_positions
+        chunks: Dict[int, Tuple[int, int, int]] = {}
+        all_ids, all_positions = array('i'), array('q')
+        for starts, counts, ids, positions in self._pool().map(_parse_segments, *zip(*tasks)):
+            lo = len(all_ids)
+            for start, n in zip(starts, counts):
+                chunks[start] = (ends[start], lo, lo + n)
+                lo += n
+            all_ids.extend(ids)
+            all_positions.extend(positions)
+
+        result = self._stitch(tokens, chunks, all_ids, all_positions)
+        self.last_stats.update(segments=len(segments), tasks=len(tasks), chunks=len(chunks),
+                               used=self.last_stats.get("used", 0), parallel=result is not None)
+        if result is None:
+            return self.parser.parse(tokens, trace=False)
+        return result
+
+    def _segments(self, tokens: List[Symbol]) -> List[Tuple[int, int]]:
+        # Trozos no vacíos entre terminales de sincronización
+        segments: List[Tuple[int, int]] = []
+        start = 0
+        sync = self.sync
+        for i, t in enumerate(tokens):
+            if t == sync:
+                if i > start:
+                    segments.append((start, i))
+                start = i + 1
+        if len(tokens) > start:
+            segments.append((start, len(tokens)))
+        return segments
+
+    def _stitch(self, tokens: List[Symbol], chunks: Dict[int, Tuple[int, int, int]], ids: array,
+                chunk_positions: array) -> Optional[dict]:
+        """El análisis final con las tablas completas; None si no acepta."""
+        action = self.parser.action.get
+        goto = self.parser.goto.get
+        productions = self._productions
+        chunk = self.chunk
+        tokens = tokens + [Grammar.END_MARKER]
+        states: List[int] = [0]
+        reductions: List[Production] = []
+        positions: List[int] = []
+        pos = 0
+        used = 0
+        while True:
+            s = states[-1]
+            act = action((s, tokens[pos]))
+            if act is None:
+                return None
+            if act[0] == 's':
+                found = chunks.get(pos)
+                g = goto((s, chunk)) if found is not None else None
+                if g is not None:
+                    end, lo, hi = found
+                    reductions.extend(map(productions.__getitem__, ids[lo:hi]))
+                    positions.extend(chunk_positions[lo:hi])
+                    states.append(g)
+                    pos = end
+                    used += 1
+                else:
+                    states.append(act[1])  # type: ignore[arg-type]
+                    pos += 1
+            elif act[0] == 'r':
+                head, body = act[1]  # type: ignore[misc]
+                k = 0 if body == [Grammar.EPSILON] else len(body)
+                if k:
+                    del states[-k:]
+                reductions.append((head, body))
+                positions.append(pos)
+                g = goto((states[-1], head))
+                if g is None:
+                    return None
+                states.append(g)
+            elif act[0] == 'acc':
+                self.last_stats["used"] = used
+                return {
+                    'accepted': True,
+                    'steps': [],
+                    'reductions': reductions,
+                    'positions': positions,
+                    'position': pos,
+                }
+            else:
+                return None
@@ -1,18 +1,47 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import time
 
 from .grammar import Grammar, Symbol
 
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
 ActionValue = Tuple[str, int] | Tuple[str, Tuple[str, List[str]]] | Tuple[str]
 
 
 class LR1Parser:
-    def __init__(self, grammar: Grammar, action: Dict[Tuple[int, Symbol], ActionValue], goto: Dict[Tuple[int, Symbol], int]):
+    def __init__(self, grammar: Grammar, action: Dict[Tuple[int, Symbol], ActionValue], goto: Dict[Tuple[int, Symbol], int],
+                 metrics: Optional["Metrics"] = None):
         self.grammar = grammar
         self.action = action
         self.goto = goto
+        self.metrics = metrics
+
+    def parse(self, tokens: List[Symbol], trace: bool = True) -> dict:
+        """
+        Analiza `tokens`. Con `trace=False` no se guardan los pasos (pila y
+        entrada en cada paso), que es lo costoso en entradas largas.
+        `position` en el resultado es el índice del token donde terminó y
+        `positions[t]` el de la reducción t (ver `derivation.Derivation`).
+        """
+        m = self.metrics
+        if m is None:
+            return self._parse(tokens, trace)
+        with m.track_memory():
+            start = time.perf_counter()
+            result = self._parse(tokens, trace)
+            m.add_time("parse", time.perf_counter() - start)
+        m.count("parses")
+        m.count("accepted", int(result['accepted']))
+        m.count("tokens", len(tokens) - (1 if tokens and tokens[-1] == Grammar.END_MARKER else 0))
+        m.count("shifts", result['position'])
+        m.count("reductions", len(result['reductions']))
+        if m.timings["parse"] > 0:
+            m.set("tokens_per_second", m.counters["tokens"] / m.timings["parse"])
+        return result
 
-    def parse(self, tokens: List[Symbol]) -> dict:
+    def _parse(self, tokens: List[Symbol], trace: bool) -> dict:
         if not tokens or tokens[-1] != Grammar.END_MARKER:
             tokens = tokens + [Grammar.END_MARKER]
         state_stack: List[int] = [0]
@@ -20,8 +49,11 @@ class LR1Parser:
         pos = 0
         steps: List[dict] = []
         reductions: List[tuple[str, List[str]]] = []
+        positions: List[int] = []
 
         def snapshot(action_desc: str):
+            if not trace:
+                return
             steps.append({
                 'states': state_stack.copy(),
                 'symbols': sym_stack.copy(),
@@ -41,6 +73,8 @@ class LR1Parser:
                     'error': f'No hay acción para estado {s} y símbolo {a}',
                     'steps': steps,
                     'reductions': reductions,
+                    'positions': positions,
+                    'position': pos,
                 }
             if act[0] == 's':
                 j = act[1]  # type: ignore[index]
@@ -59,6 +93,7 @@ class LR1Parser:
                     if state_stack:
                         state_stack.pop()
                 reductions.append((head, body))
+                positions.append(pos)
                 t = state_stack[-1]
                 sym_stack.append(head)
                 g = self.goto.get((t, head))
@@ -69,6 +104,8 @@ class LR1Parser:
                         'error': f'No hay transición GOTO para ({t}, {head})',
                         'steps': steps,
                         'reductions': reductions,
+                        'positions': positions,
+                        'position': pos,
                     }
                 state_stack.append(g)
                 snapshot(f'reduce {head} -> {" ".join(body) if body else Grammar.EPSILON}, goto {g}')
@@ -78,6 +115,8 @@ class LR1Parser:
                     'accepted': True,
                     'steps': steps,
                     'reductions': reductions,
+                    'positions': positions,
+                    'position': pos,
                 }
             else:
                 snapshot(f'error: acción desconocida {act}')
@@ -86,4 +125,6 @@ class LR1Parser:
                     'error': f'Acción desconocida: {act}',
                     'steps': steps,
                     'reductions': reductions,
+                    'positions': positions,
+                    'position': pos,
                 }
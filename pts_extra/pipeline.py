@@ -0,0 +1,193 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+import hashlib
+import pickle
+import threading
+
+from .grammar import Grammar, Symbol
+from .lr1 import LR1Builder
+from .metrics import Metrics
+from .parser import ActionValue, LR1Parser
+from .reduction import ReductionReport, count_states, reduce_grammar
+
+
+def normalize_grammar_text(text: str) -> str:
+    """
+    Forma canónica del texto BNF usada como clave de caché: sin espacios al
+    principio y final de cada línea, sin líneas vacías ni comentarios.
+    Dos textos con la misma forma normalizada producen la misma gramática.
+    """
+    lines = (ln.strip() for ln in text.splitlines())
+    return "\n".join(ln for ln in lines if ln and not ln.startswith('#'))
+
+
+def grammar_key(text: str) -> str:
+    return hashlib.sha256(normalize_grammar_text(text).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CompiledGrammar:
+    key: str
+    grammar: Grammar
+    first: Dict[Symbol, Set[Symbol]]
+    follow: Dict[Symbol, Set[Symbol]]
+    builder: LR1Builder
+    metrics: Optional[Metrics] = None
+    reduction: Optional[ReductionReport] = None
+
+
+def compile_grammar(text: str, progress: Optional[Callable[[int, int, int], None]] = None,
+                    metrics: Optional[Metrics] = None, source: Optional[str] = None,
+                    reduce: bool = True, inline: bool = False, compare_states: bool = False) -> CompiledGrammar:
+    """
+    Gramática → reducción → FIRST/FOLLOW → tablas LR(1), en un solo paso.
+    `progress` se pasa a `LR1Builder.build_tables`; con `metrics` se miden
+    además la lectura de la gramática, la reducción y FIRST/FOLLOW. Se lee
+    el texto original (no el normalizado) para que errores y conflictos
+    citen las líneas del usuario; `source` es el nombre del archivo en esos
+    mensajes.
+
+    Con `reduce` (por defecto) se quitan los símbolos inútiles y las
+    alternativas duplicadas antes de construir (ver `reduction`); `inline`
+    sustituye además los no terminales de un solo uso. Con `compare_states`
+    se construye también la colección de la gramática sin reducir para
+    informar de cuántos estados se ahorran.
+    """
+    report: Optional[ReductionReport] = None
+    if metrics is None:
+        grammar = Grammar.parse_bnf(text, source)
+        if reduce:
+            original = grammar
+            grammar, report = reduce_grammar(grammar, inline)
+        first = grammar.compute_first()
+        follow = grammar.compute_follow()
+    else:
+        with metrics.phase("parse_bnf"):
+            grammar = Grammar.parse_bnf(text, source)
+        if reduce:
+            original = grammar
+            with metrics.phase("reduce"):
+                grammar, report = reduce_grammar(grammar, inline)
+        with metrics.phase("first_follow"):
+            first = grammar.compute_first()
+            follow = grammar.compute_follow()
+    builder = LR1Builder(grammar, metrics)
+    builder.build_tables(progress)
+    if report is not None:
+        report.states_after = len(builder.states)
+        if compare_states:
+            report.states_before = report.states_after if original is grammar else count_states(original)
+    return CompiledGrammar(grammar_key(text), grammar, first, follow, builder, metrics, report)
+
+
+Entry = TypeVar("Entry")
+
+
+class KeyedRegistry(Generic[Entry]):
+    """
+    Registro acotado (LRU) de entradas con atributo `key` (p. ej.
+    `grammar_key`). Es seguro entre hilos; `on_evict` recibe cada entrada
+    expulsada.
+    """
+
+    def __init__(self, max_entries: int = 32, on_evict: Optional[Callable[[Entry], None]] = None):
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: Entry, key: Optional[str] = None) -> None:
+        """Guarda `entry` con la clave `key` (por defecto, `entry.key`)."""
+        key = entry.key if key is None else key
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                if self.on_evict is not None:
+                    self.on_evict(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), OrderedDict()
+        if self.on_evict is not None:
+            for evicted in entries:
+                self.on_evict(evicted)
+
+
+class CompiledRegistry(KeyedRegistry[CompiledGrammar]):
+    """Registro de gramáticas compiladas, indexado por `grammar_key`."""
+
+    def get_or_compile(self, text: str, key: Optional[str] = None) -> CompiledGrammar:
+        key = grammar_key(text) if key is None else key
+        compiled = self.get(key)
+        if compiled is None:
+            compiled = compile_grammar(text)
+            self.put(compiled, key)
+        return compiled
+
+
+ARTIFACT_FORMAT = "pts-lr1-tables"
+ARTIFACT_VERSION = 1
+
+
+@dataclass
+class TableArtifact:
+    """Lo mínimo para analizar cadenas sin reconstruir el autómata."""
+    key: str
+    grammar: Grammar
+    action: Dict[Tuple[int, Symbol], ActionValue]
+    goto: Dict[Tuple[int, Symbol], int]
+    n_states: int
+    conflicts: List[str]
+
+    @classmethod
+    def from_compiled(cls, compiled: CompiledGrammar) -> "TableArtifact":
+        b = compiled.builder
+        return cls(compiled.key, compiled.grammar, b.action, b.goto_table, len(b.states), list(b.conflicts))
+
+    def parser(self) -> LR1Parser:
+        return LR1Parser(self.grammar, self.action, self.goto)
+
+    def dense_tables(self):
+        """Tablas como matrices NumPy (`tables.DenseTables`), p. ej. para `batch.BatchRecognizer`."""
+        from .tables import dense_tables_from
+        return dense_tables_from(self.grammar.augmented(), self.action, self.goto, self.n_states)
+
+
+def save_artifact(artifact: TableArtifact, path: str) -> None:
+    with open(path, "wb") as fh:
+        pickle.dump({"format": ARTIFACT_FORMAT, "version": ARTIFACT_VERSION, "artifact": artifact}, fh,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_artifact(path: str) -> TableArtifact:
+    """
+    Carga un artefacto guardado con `save_artifact`. Usa pickle: carga solo
+    archivos de confianza.
+    """
+    with open(path, "rb") as fh:
+        try:
+            data = pickle.load(fh)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            raise ValueError(f"{path} no es un artefacto de tablas LR(1)") from e
+    if not isinstance(data, dict) or data.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} no es un artefacto de tablas LR(1)")
+    if data.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"Versión de artefacto no soportada: {data.get('version')}")
+    return data["artifact"]
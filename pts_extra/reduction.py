@@ -0,0 +1,212 @@
+"""
+Gramática reducida: se quitan los símbolos inútiles antes de construir las
+tablas.
+
+1. No terminales improductivos (no derivan ninguna cadena de terminales) y
+   las alternativas que los usan.
+2. No terminales inalcanzables desde el símbolo inicial.
+3. Opcionalmente (`inline=True`), se sustituyen los no terminales con una
+   sola alternativa que aparecen una sola vez. Cambia las reducciones que
+   ve el analizador, por eso no se hace por defecto.
+4. Alternativas duplicadas de un mismo no terminal.
+
+Cada paso es lineal en el tamaño de la gramática. Las alternativas que
+quedan conservan su posición en el fuente (`Grammar.spans`). El no
+terminal de los trozos de `%sync t N` cuenta como alcanzable y no se
+sustituye; si `N` o `t` desaparecen de la gramática reducida se descarta la
+directiva con un aviso.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .grammar import Grammar, Production, Symbol
+
+Alternative = Tuple[Symbol, Production]
+
+
+@dataclass
+class ReductionReport:
+    non_productive: List[Symbol] = field(default_factory=list)
+    unreachable: List[Symbol] = field(default_factory=list)
+    removed: List[Alternative] = field(default_factory=list)
+    inlined: List[Symbol] = field(default_factory=list)
+    duplicates: List[Alternative] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    states_before: Optional[int] = None
+    states_after: Optional[int] = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.non_productive or self.unreachable or self.removed or self.inlined or self.duplicates)
+
+    def lines(self) -> List[str]:
+        def alt(a: Alternative) -> str:
+            return f"{a[0]} -> {' '.join(a[1]) or Grammar.EPSILON}"
+
+        out = list(self.warnings)
+        if self.non_productive:
+            out.append(f"Improductivos: {', '.join(self.non_productive)}")
+        if self.removed:
+            out.append(f"Alternativas con símbolos improductivos: {'; '.join(alt(a) for a in self.removed)}")
+        if self.unreachable:
+            out.append(f"Inalcanzables: {', '.join(self.unreachable)}")
+        if self.inlined:
+            out.append(f"Sustituidos en su único uso: {', '.join(self.inlined)}")
+        if self.duplicates:
+            out.append(f"Alternativas duplicadas: {'; '.join(alt(a) for a in self.duplicates)}")
+        if self.states_before is not None and self.states_after is not None:
+            out.append(f"Estados LR(1): {self.states_before} → {self.states_after}")
+        return out
+
+
+def _productive(grammar: Grammar) -> Set[Symbol]:
+    # Cada alternativa cuenta sus no terminales aún no productivos; al llegar
+    # a cero su cabeza es productiva. Cada aparición se descuenta una vez.
+    nts = grammar.nonterminals
+    pending: Dict[Tuple[Symbol, int], int] = {}
+    uses: Dict[Symbol, List[Tuple[Symbol, int]]] = {A: [] for A in nts}
+    ready: List[Symbol] = []
+    for A, alts in grammar.productions.items():
+        for i, body in enumerate(alts):
+            n = 0
+            for X in body:
+                if X in nts:
+                    uses[X].append((A, i))
+                    n += 1
+            pending[(A, i)] = n
+            if n == 0:
+                ready.append(A)
+    productive: Set[Symbol] = set()
+    while ready:
+        A = ready.pop()
+        if A in productive:
+            continue
+        productive.add(A)
+        for key in uses[A]:
+            pending[key] -= 1
+            if pending[key] == 0:
+                ready.append(key[0])
+    return productive
+
+
+def _reachable(roots: List[Symbol], productions: Dict[Symbol, List[Production]]) -> Set[Symbol]:
+    seen = set(roots)
+    stack = list(seen)
+    while stack:
+        for body in productions.get(stack.pop(), ()):
+            for X in body:
+                if X in productions and X not in seen:
+                    seen.add(X)
+                    stack.append(X)
+    return seen
+
+
+def _expand(body: Production, inline: Dict[Symbol, Production], epsilon: Symbol) -> Production:
+    # Expansión iterativa: las cadenas de sustituciones pueden ser muy largas
+    out: Production = []
+    stack = [iter(body)]
+    while stack:
+        for X in stack[-1]:
+            if X in inline:
+                stack.append(iter(inline[X]))
+                break
+            if X != epsilon:
+                out.append(X)
+        else:
+            stack.pop()
+    return out
+
+
+def reduce_grammar(grammar: Grammar, inline: bool = False) -> Tuple[Grammar, ReductionReport]:
+    """
+    Devuelve la gramática reducida y el informe. Si no hay nada que quitar
+    se devuelve la misma gramática.
+    """
+    report = ReductionReport()
+    eps = grammar.EPSILON
+    start = grammar.start_symbol
+    spans = grammar.spans
+    chunk = grammar.sync[1] if grammar.sync else None
+
+    productive = _productive(grammar)
+    if start not in productive:
+        report.warnings.append(f"El símbolo inicial {start} no genera ninguna cadena; no se reduce la gramática")
+        return grammar, report
+    report.non_productive = sorted(grammar.nonterminals - productive)
+
+    # (cuerpo, span) por cabeza, sin las alternativas que usan improductivos
+    kept: Dict[Symbol, List[Tuple[Production, object]]] = {}
+    for A, alts in grammar.productions.items():
+        if A not in productive:
+            continue
+        head_spans = spans.get(A) or [None] * len(alts)
+        rows = kept[A] = []
+        for body, span in zip(alts, head_spans):
+            if any(X in grammar.nonterminals and X not in productive for X in body):
+                report.removed.append((A, body))
+            else:
+                rows.append((body, span))
+
+    roots = [start, chunk] if chunk in kept else [start]
+    reachable = _reachable(roots, {A: [b for b, _ in rows] for A, rows in kept.items()})
+    report.unreachable = sorted(A for A in kept if A not in reachable)
+    kept = {A: rows for A, rows in kept.items() if A in reachable}
+
+    if inline:
+        occurrences: Dict[Symbol, int] = {A: 0 for A in kept}
+        for rows in kept.values():
+            for body, _ in rows:
+                for X in body:
+                    if X in occurrences:
+                        occurrences[X] += 1
+        substitutions = {
+            A: rows[0][0] for A, rows in kept.items()
+            if A != start and A != chunk and len(rows) == 1 and occurrences[A] == 1 and A not in rows[0][0]
+        }
+        if substitutions:
+            report.inlined = sorted(substitutions)
+            kept = {
+                A: [(_expand(body, substitutions, eps) or [eps], span) for body, span in rows]
+                for A, rows in kept.items() if A not in substitutions
+            }
+
+    productions: Dict[Symbol, List[Production]] = {}
+    new_spans: Dict[Symbol, list] = {}
+    for A, rows in kept.items():
+        seen: Set[Tuple[Symbol, ...]] = set()
+        bodies = productions[A] = []
+        head_spans = new_spans[A] = []
+        for body, span in rows:
+            key = tuple(X for X in body if X != eps)
+            if key in seen:
+                report.duplicates.append((A, body))
+                continue
+            seen.add(key)
+            bodies.append(body)
+            head_spans.append(span)
+
+    if not report.changed:
+        return grammar, report
+    reduced = Grammar(start, productions, copy=False)
+    reduced.spans = new_spans if spans else {}
+    reduced.source = grammar.source
+    reduced.sync = grammar.sync
+    if chunk is not None:
+        t = grammar.sync[0]
+        if chunk not in productions:
+            report.warnings.append(f"El no terminal {chunk} de %sync no genera ninguna cadena; se descarta la directiva")
+            reduced.sync = None
+        elif t not in reduced.terminals:
+            report.warnings.append(f"El terminal {t} de %sync no queda en la gramática reducida; se descarta la directiva")
+            reduced.sync = None
+    return reduced, report
+
+
+def count_states(grammar: Grammar) -> int:
+    """Estados de la colección canónica LR(1) de `grammar` (construcción completa)."""
+    from .lr1 import LR1Builder
+
+    builder = LR1Builder(grammar)
+    builder.build_canonical_collection()
+    return len(builder.states)
@@ -0,0 +1,226 @@
+"""
+Generador de oraciones aleatorias para pruebas de carga del analizador.
+
+`SentenceGenerator` deriva oraciones de una `Grammar` con una pila
+explícita (sin recursión) y un presupuesto de longitud: antes de expandir
+un no terminal solo se consideran las alternativas cuya longitud mínima de
+derivación cabe en lo que queda, así que el trabajo es lineal en la
+longitud de la oración. Las longitudes mínimas se calculan una vez por
+punto fijo. Entre las alternativas que caben se prefieren las menos usadas,
+para cubrir todas las producciones.
+
+`mutate` y `SentenceGenerator.rejected` producen entradas casi válidas
+(borrar, insertar, cambiar o intercambiar un token) para medir el camino
+de error; con un analizador se verifica que de verdad se rechacen.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import math
+import random
+
+from .grammar import Grammar, Symbol
+from .parser import LR1Parser
+
+INF = math.inf
+
+
+def _body(grammar: Grammar, alt: List[Symbol]) -> List[Symbol]:
+    return [] if alt == [grammar.EPSILON] else [X for X in alt if X != grammar.EPSILON]
+
+
+def min_lengths(grammar: Grammar) -> Tuple[Dict[Symbol, float], Dict[Tuple[Symbol, int], float], Dict[Symbol, int]]:
+    """
+    Longitud mínima (en terminales) derivable desde cada no terminal y desde
+    cada alternativa `(A, i)`, y la alternativa que la alcanza. Los no
+    terminales improductivos quedan en `inf` y sin alternativa.
+
+    Solo se actualiza ante una mejora estricta, así que seguir siempre la
+    mejor alternativa termina (no hay ciclos entre mejores alternativas).
+    """
+    nt: Dict[Symbol, float] = {A: INF for A in grammar.nonterminals}
+    best: Dict[Symbol, int] = {}
+
+    def cost(body: List[Symbol]) -> float:
+        return sum(nt[X] if X in nt else 1 for X in body)
+
+    bodies = {(A, i): _body(grammar, alt) for A, alts in grammar.productions.items() for i, alt in enumerate(alts)}
+    changed = True
+    while changed:
+        changed = False
+        for (A, i), body in bodies.items():
+            c = cost(body)
+            if c < nt[A]:
+                nt[A] = c
+                best[A] = i
+                changed = True
+    return nt, {key: cost(body) for key, body in bodies.items()}, best
+
+
+class SentenceGenerator:
+    """
+    Oraciones aleatorias de `grammar` con a lo sumo `max_length` tokens.
+
+    `target_length` es una longitud orientativa (por defecto se sortea en
+    cada oración entre la mínima y `max_length`). Mientras la oración en
+    curso quede por debajo se elige entre todas las alternativas que caben,
+    con preferencia por las que la alargan; después, solo las que la cierran
+    por el camino más corto. La fase de crecimiento tiene un número acotado
+    de expansiones, así que el trabajo es lineal en `max_length`.
+    """
+
+    def __init__(self, grammar: Grammar, max_length: int = 50, target_length: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.grammar = grammar
+        self.max_length = max_length
+        self.target_length = target_length
+        self.rng = random.Random(seed)
+        self.nt_min, self.alt_min, best = min_lengths(grammar)
+        if self.nt_min.get(grammar.start_symbol, INF) == INF:
+            raise ValueError(f"El símbolo inicial {grammar.start_symbol} no deriva ninguna cadena de terminales")
+        if self.nt_min[grammar.start_symbol] > max_length:
+            raise ValueError(f"La oración más corta tiene {int(self.nt_min[grammar.start_symbol])} tokens, "
+                             f"más que max_length={max_length}")
+        self._bodies: Dict[Symbol, List[List[Symbol]]] = {
+            A: [_body(grammar, alt) for alt in alts] for A, alts in grammar.productions.items()
+        }
+        # Alternativas que suben la longitud mínima comprometida, y las que
+        # cierran sin ciclos: la mejor o las de hijos con mínimo estrictamente menor
+        self._growing: Dict[Symbol, List[int]] = {}
+        self._closing: Dict[Symbol, List[int]] = {}
+        for A, bodies in self._bodies.items():
+            m = self.nt_min[A]
+            self._growing[A] = [i for i in range(len(bodies)) if m < self.alt_min[(A, i)] < INF]
+            self._closing[A] = [i for i, body in enumerate(bodies)
+                                if i == best.get(A) or (self.alt_min[(A, i)] == m
+                                                        and all(self.nt_min.get(X, -1) < m for X in body))]
+        self._grow_steps = 4 * (max_length + len(self._bodies))
+        self.uses: Dict[Tuple[Symbol, int], int] = {key: 0 for key in self.alt_min}
+
+    def _least_used(self, A: Symbol, options: List[int]) -> int:
+        least = min(self.uses[(A, i)] for i in options)
+        return self.rng.choice([i for i in options if self.uses[(A, i)] == least])
+
+    def _choose(self, A: Symbol, budget: float, committed: float, target: int) -> int:
+        if committed >= target:
+            return self._least_used(A, self._closing[A])
+        growing = [i for i in self._growing[A] if self.alt_min[(A, i)] <= budget]
+        if growing and self.rng.random() >= committed / target:
+            return self._least_used(A, growing)
+        fits = [i for i in range(len(self._bodies[A])) if self.alt_min[(A, i)] <= budget]
+        return self._least_used(A, fits)
+
+    def sentence(self) -> List[Symbol]:
+        nt_min = self.nt_min
+        start = self.grammar.start_symbol
+        target = self.target_length
+        if target is None:
+            target = self.rng.randint(int(nt_min[start]), self.max_length)
+        out: List[Symbol] = []
+        stack: List[Symbol] = [start]
+        # Longitud mínima de lo que queda en la pila
+        pending = nt_min[start]
+        steps = self._grow_steps
+        while stack:
+            X = stack.pop()
+            if X not in nt_min:
+                out.append(X)
+                pending -= 1
+                continue
+            pending -= nt_min[X]
+            committed = len(out) + pending + nt_min[X]
+            if steps:
+                steps -= 1
+            else:
+                committed = target
+            i = self._choose(X, self.max_length - len(out) - pending, committed, target)
+            self.uses[(X, i)] += 1
+            pending += self.alt_min[(X, i)]
+            stack.extend(reversed(self._bodies[X][i]))
+        return out
+
+    def stream(self, n: Optional[int] = None) -> Iterator[List[Symbol]]:
+        """Genera `n` oraciones (o indefinidamente si `n` es None)."""
+        count = 0
+        while n is None or count < n:
+            yield self.sentence()
+            count += 1
+
+    def rejected(self, n: Optional[int] = None, parser: Optional[LR1Parser] = None,
+                 attempts: int = 20, max_misses: int = 50) -> Iterator[List[Symbol]]:
+        """
+        Oraciones mutadas. Con `parser` solo se devuelven las que rechaza
+        (hasta `attempts` mutaciones por oración; si ninguna falla se omite).
+        Si `max_misses` oraciones seguidas se omiten se lanza ValueError: en
+        lenguajes como `S -> a S | ε` ninguna mutación es rechazada.
+        """
+        terminals = sorted(self.grammar.terminals)
+        count = 0
+        misses = 0
+        while n is None or count < n:
+            base = self.sentence()
+            for _ in range(attempts):
+                tokens = mutate(base, terminals, self.rng)
+                if parser is None or not parser.parse(tokens, trace=False)['accepted']:
+                    yield tokens
+                    count += 1
+                    misses = 0
+                    break
+            else:
+                misses += 1
+                if misses >= max_misses:
+                    raise ValueError(f"Ninguna mutación de {max_misses} oraciones seguidas es rechazada; "
+                                     "el lenguaje acepta casi cualquier cadena de terminales")
+
+    def production_coverage(self) -> float:
+        """Fracción de producciones usadas al menos una vez."""
+        return sum(1 for c in self.uses.values() if c) / len(self.uses) if self.uses else 1.0
+
+    def unused_productions(self) -> List[Tuple[Symbol, List[Symbol]]]:
+        return [(A, self.grammar.productions[A][i]) for (A, i), c in self.uses.items() if not c]
+
+
+def mutate(tokens: List[Symbol], terminals: List[Symbol], rng: random.Random) -> List[Symbol]:
+    """Una mutación aleatoria: borrar, insertar, cambiar o intercambiar un token."""
+    out = list(tokens)
+    ops = ["insert"] if not out else ["delete", "insert", "replace", "swap"]
+    op = rng.choice(ops)
+    if op == "delete":
+        del out[rng.randrange(len(out))]
+    elif op == "insert":
+        out.insert(rng.randrange(len(out) + 1), rng.choice(terminals))
+    elif op == "replace":
+        out[rng.randrange(len(out))] = rng.choice(terminals)
+    elif len(out) > 1:
+        i = rng.randrange(len(out) - 1)
+        out[i], out[i + 1] = out[i + 1], out[i]
+    else:
+        out.append(rng.choice(terminals))
+    return out
+
+
+def state_coverage(parser: LR1Parser, sentences: Iterable[List[Symbol]]) -> Set[int]:
+    """Estados del autómata visitados al analizar `sentences`."""
+    action, goto = parser.action, parser.goto
+    seen: Set[int] = {0}
+    for tokens in sentences:
+        tokens = list(tokens) + [Grammar.END_MARKER]
+        stack = [0]
+        pos = 0
+        while True:
+            act = action.get((stack[-1], tokens[pos]))
+            if act is None or act[0] == 'acc':
+                break
+            if act[0] == 's':
+                stack.append(act[1])
+                pos += 1
+            else:
+                head, body = act[1]
+                k = 0 if body == [Grammar.EPSILON] else len(body)
+                if k:
+                    del stack[-k:]
+                nxt = goto.get((stack[-1], head))
+                if nxt is None:
+                    break
+                stack.append(nxt)
+            seen.add(stack[-1])
+    return seen
@@ -0,0 +1,417 @@
+"""
+Servicio de análisis LR(1) por TCP con JSON por líneas.
+
+Cada petición es un objeto JSON en una línea y recibe una respuesta con el
+mismo "id" (las respuestas pueden llegar en otro orden):
+
+    {"id": 1, "op": "compile", "grammar": "S -> a S b | ε"}
+    {"id": 2, "op": "parse", "grammar": "...", "inputs": ["a b", "a a b b"]}
+    {"id": 3, "op": "parse", "key": "<hash devuelto por compile>", "input": "a b"}
+    {"id": 4, "op": "stats"}
+
+Las gramáticas se compilan una sola vez (en el pool de workers) y se guardan
+en un registro acotado indexado por `grammar_key`; las tablas se publican en
+memoria compartida y los workers se adjuntan a ellas sin copiarlas (ver
+`pts_extra.shared_tables`). Los análisis se agrupan en
+lotes por gramática y se envían al pool; el número de peticiones en curso
+está acotado, y al llegar al límite se deja de leer de las conexiones.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import json
+import multiprocessing as mp
+
+from .pipeline import KeyedRegistry, compile_grammar, grammar_key
+from .parser import LR1Parser
+from .shared_tables import SharedTableRegistry, publish
+from .tables import dense_tables
+
+
+@dataclass
+class GrammarEntry:
+    key: str
+    segment: Optional[str]
+    n_states: int
+    conflicts: List[str] = field(default_factory=list)
+    # Análisis en curso que usan el segmento; si se expulsa con pins > 0,
+    # el segmento se borra al terminar el último
+    pins: int = 0
+    evicted: bool = False
+
+
+# ---------------- Lado del worker -----------------
+
+_WORKER_CACHE_SIZE = 16
+_worker_parsers: "OrderedDict[str, LR1Parser]" = OrderedDict()
+_worker_tables = SharedTableRegistry(track=False)
+
+
+def _compile_and_publish(text: str) -> Tuple[str, Optional[str], int, List[str]]:
+    compiled = compile_grammar(text)
+    b = compiled.builder
+    if b.conflicts:
+        return compiled.key, None, len(b.states), list(b.conflicts)
+    # El segmento no queda ligado a este worker: lo borra el servidor
+    shared = publish(dense_tables(b), compiled.key, compiled.grammar, track=False)
+    name = shared.name
+    shared.close()
+    return compiled.key, name, len(b.states), []
+
+
+def _parse_batch(key: str, inputs: List[str]) -> List[Dict[str, Any]]:
+    parser = _worker_parsers.get(key)
+    if parser is None:
+        parser = _worker_tables.parser(key)
+        _worker_parsers[key] = parser
+        while len(_worker_parsers) > _WORKER_CACHE_SIZE:
+            evicted, _ = _worker_parsers.popitem(last=False)
+            _worker_tables.release(evicted)
+    else:
+        _worker_parsers.move_to_end(key)
+    results = []
+    for line in inputs:
+        # Un error en una línea no debe hacer fallar al resto del lote, que
+        # puede venir de otras peticiones
+        try:
+            result = parser.parse(line.split(), trace=False)
+        except Exception as e:
+            results.append({"accepted": False, "error": f"{type(e).__name__}: {e}"})
+            continue
+        results.append({"accepted": result['accepted'], "error": result.get('error')})
+    return results
+
+
+# ---------------- Lado del servidor -----------------
+
+def _inputs(request: Dict[str, Any]) -> List[str]:
+    """Cadenas de una petición "parse": "inputs" (lista de cadenas) o "input" (una cadena)."""
+    if "inputs" in request:
+        inputs = request["inputs"]
+        if not isinstance(inputs, list) or not all(isinstance(line, str) for line in inputs):
+            raise ValueError("'inputs' debe ser una lista de cadenas")
+        return inputs
+    if "input" in request:
+        if not isinstance(request["input"], str):
+            raise ValueError("'input' debe ser una cadena")
+        return [request["input"]]
+    raise ValueError("Falta 'inputs' o 'input'")
+
+
+class _Batcher:
+    """Agrupa análisis de la misma gramática en un único envío al pool."""
+
+    def __init__(self, service: "ParseService", entry: GrammarEntry):
+        self.service = service
+        self.entry = entry
+        self.pending: List[Tuple[List[str], asyncio.Future]] = []
+        self.size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, inputs: List[str]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self.pending.append((inputs, fut))
+        self.size += len(inputs)
+        if self.size >= self.service.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.service.max_delay, self.flush)
+        return fut
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+        pending, self.pending, self.size = self.pending, [], 0
+        combined = [line for inputs, _ in pending for line in inputs]
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self.service.executor, _parse_batch, self.entry.key, combined)
+        self.service.batches += 1
+
+        def done(t: asyncio.Future):
+            if t.cancelled():
+                # p. ej. `close()` canceló el trabajo pendiente del pool
+                for _, fut in pending:
+                    if not fut.done():
+                        fut.set_exception(RuntimeError("Análisis cancelado: el servicio se está cerrando"))
+                return
+            if t.exception() is not None:
+                for _, fut in pending:
+                    if not fut.done():
+                        fut.set_exception(t.exception())
+                return
+            results = t.result()
+            start = 0
+            for inputs, fut in pending:
+                if not fut.done():
+                    fut.set_result(results[start:start + len(inputs)])
+                start += len(inputs)
+
+        task.add_done_callback(done)
+
+
+class ParseService:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_grammars: int = 32,
+        max_batch: int = 256,
+        max_delay: float = 0.002,
+        max_inflight: int = 64,
+        executor: Optional[Executor] = None,
+    ):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_inflight = max_inflight
+        self._own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers, mp_context=mp.get_context("spawn"))
+        self.registry: KeyedRegistry[GrammarEntry] = KeyedRegistry(max_grammars, on_evict=self._evicted)
+        self._batchers: Dict[str, _Batcher] = {}
+        self._compiling: Dict[str, asyncio.Future] = {}
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.requests = 0
+        self.batches = 0
+        self.inflight = 0
+
+    def _evicted(self, entry: GrammarEntry) -> None:
+        batcher = self._batchers.get(entry.key)
+        if batcher is not None and batcher.entry is entry:
+            del self._batchers[entry.key]
+        entry.evicted = True
+        if entry.pins == 0:
+            self._unlink(entry)
+
+    def _unpin(self, entry: GrammarEntry) -> None:
+        entry.pins -= 1
+        if entry.pins == 0 and entry.evicted:
+            self._unlink(entry)
+
+    def _unlink(self, entry: GrammarEntry) -> None:
+        # Si la gramática se volvió a compilar mientras tanto, la entrada nueva
+        # usa el mismo segmento (el nombre sale de la clave) y lo borrará ella
+        if entry.segment is None or entry.key in self.registry:
+            return
+        SharedTableRegistry().release(entry.key, unlink=True)
+
+    async def compile(self, text: str) -> GrammarEntry:
+        key = grammar_key(text)
+        entry = self.registry.get(key)
+        if entry is not None:
+            return entry
+        # Peticiones simultáneas con la misma gramática esperan a la misma compilación
+        pending = self._compiling.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(self.executor, _compile_and_publish, text)
+            self._compiling[key] = pending
+            try:
+                entry = GrammarEntry(*await pending)
+            finally:
+                self._compiling.pop(key, None)
+            self.registry.put(entry)
+            return entry
+        await pending
+        return self.registry.get(key) or await self.compile(text)
+
+    async def parse(self, inputs: List[str], grammar: Optional[str] = None, key: Optional[str] = None) -> List[Dict[str, Any]]:
+        if grammar is not None:
+            entry = await self.compile(grammar)
+        elif key is not None:
+            entry = self.registry.get(key)
+            if entry is None:
+                raise LookupError(f"Gramática desconocida o expulsada del registro: {key}")
+        else:
+            raise ValueError("Falta 'grammar' o 'key'")
+        if entry.conflicts:
+            raise ValueError(f"La gramática tiene {len(entry.conflicts)} conflicto(s) y no es LR(1)")
+        batcher = self._batchers.get(entry.key)
+        if batcher is None:
+            batcher = self._batchers[entry.key] = _Batcher(self, entry)
+        # El segmento no se borra mientras haya lotes pendientes o en el pool
+        entry.pins += 1
+        try:
+            # Las peticiones grandes se reparten en varios lotes en paralelo
+            futures = [batcher.submit(inputs[i:i + self.max_batch]) for i in range(0, len(inputs), self.max_batch)]
+            parts = await asyncio.gather(*futures)
+        finally:
+            self._unpin(entry)
+        return [r for part in parts for r in part]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "grammars": len(self.registry),
+            "requests": self.requests,
+            "batches": self.batches,
+            "inflight": self.inflight,
+        }
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        response: Dict[str, Any] = {"id": request.get("id")}
+        try:
+            if op == "compile":
+                entry = await self.compile(request["grammar"])
+                response.update(ok=True, key=entry.key, states=entry.n_states, conflicts=entry.conflicts)
+            elif op == "parse":
+                inputs = _inputs(request)
+                results = await self.parse(inputs, grammar=request.get("grammar"), key=request.get("key"))
+                response.update(ok=True, results=results)
+            elif op == "stats":
+                response.update(ok=True, **self.stats())
+            else:
+                raise ValueError(f"Operación desconocida: {op}")
+        except Exception as e:
+            response.update(ok=False, error=f"{type(e).__name__}: {e}")
+        return response
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request: Optional[Dict[str, Any]], error: Optional[str] = None):
+            try:
+                if request is None:
+                    response = {"id": None, "ok": False, "error": f"Petición inválida: {error}"}
+                else:
+                    response = await self.handle(request)
+                async with write_lock:
+                    writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                    await writer.drain()
+            finally:
+                self.inflight -= 1
+                self._inflight.release()
+
+        try:
+            while True:
+                # Contrapresión: sin hueco libre no se lee la siguiente petición
+                await self._inflight.acquire()
+                self.inflight += 1
+                line = await reader.readline()
+                if not line:
+                    self.inflight -= 1
+                    self._inflight.release()
+                    break
+                self.requests += 1
+                request, error = None, None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        request, error = None, "se esperaba un objeto JSON"
+                except ValueError as e:
+                    error = str(e)
+                task = asyncio.ensure_future(respond(request, error))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._server = await asyncio.start_server(self._connection, host, port, limit=2 ** 24)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in list(self._batchers.values()):
+            batcher.flush()
+        if self._own_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        self.registry.clear()
+
+
+# ---------------- Cliente -----------------
+
+class ParseClient:
+    """
+    Cliente asíncrono mínimo del servicio; admite varias peticiones en vuelo
+    sobre la misma conexión.
+    """
+
+    def __init__(self):
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def connect(self, host: str, port: int) -> "ParseClient":
+        self._reader, self._writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+        self._listener = asyncio.ensure_future(self._listen())
+        return self
+
+    async def _listen(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                fut = self._pending.pop(response.get("id"), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(response)
+        finally:
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("Conexión cerrada por el servidor"))
+            self._pending.clear()
+
+    async def request(self, op: str, **payload: Any) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = fut
+        self._writer.write((json.dumps({"id": request_id, "op": op, **payload}, ensure_ascii=False) + "\n").encode("utf-8"))
+        await self._writer.drain()
+        response = await fut
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error"))
+        return response
+
+    async def compile(self, grammar: str) -> Dict[str, Any]:
+        return await self.request("compile", grammar=grammar)
+
+    async def parse(self, inputs: List[str], grammar: Optional[str] = None, key: Optional[str] = None) -> List[Dict[str, Any]]:
+        payload: Dict[str, Any] = {"inputs": inputs}
+        if grammar is not None:
+            payload["grammar"] = grammar
+        if key is not None:
+            payload["key"] = key
+        return (await self.request("parse", **payload))["results"]
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+        if self._listener is not None:
+            await self._listener
+
+    async def __aenter__(self) -> "ParseClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, **options: Any) -> None:
+    service = ParseService(**options)
+    try:
+        bound_host, bound_port = await service.start(host, port)
+        print(f"Servicio LR(1) escuchando en {bound_host}:{bound_port}", flush=True)
+        await service.serve_forever()
+    finally:
+        await service.close()
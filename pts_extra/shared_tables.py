@@ -0,0 +1,247 @@
+"""
+Tablas LR(1) compartidas entre procesos del mismo host.
+
+Cada gramática compilada se publica una vez en un segmento de
+`multiprocessing.shared_memory` con el nombre derivado de su `grammar_key`.
+Los demás procesos se adjuntan en modo solo lectura: no se copian las
+matrices, solo se deserializa una cabecera pequeña (símbolos y
+producciones). La memoria crece con el número de gramáticas, no con
+gramáticas × procesos.
+
+Disposición del segmento:
+
+    [magic | longitud de cabecera] [cabecera pickle] [action_kind] [action_arg] [goto]
+
+El magic se escribe al final, así un proceso que se adjunta mientras otro
+publica espera a que el segmento esté completo.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+import pickle
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from .grammar import Grammar
+from .parser import LR1Parser
+from .pipeline import CompiledGrammar
+from .tables import DenseTables, dense_tables
+
+_MAGIC = b"PTSLR1\x00\x01"
+_HEADER = struct.Struct("<8sQ")
+_ALIGN = 64
+_ARRAYS = ("action_kind", "action_arg", "goto")
+
+
+def segment_name(key: str) -> str:
+    # Nombres cortos: macOS limita los nombres de memoria compartida a 31 bytes
+    return f"ptslr1_{key[:20]}"
+
+
+def _align(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+_TRACK_PARAM = sys.version_info >= (3, 13)
+
+
+class _UntrackedSharedMemory(shared_memory.SharedMemory):
+    """
+    `SharedMemory` POSIX que no pasa por el resource_tracker (Python < 3.13).
+    El tracker es uno por árbol de procesos y guarda un conjunto de nombres:
+    registrar y dar de baja un segmento al adjuntarse borraría el registro
+    de quien lo publicó con seguimiento.
+    """
+
+    def __init__(self, name: str, create: bool = False, size: int = 0):
+        import _posixshmem
+        import mmap
+        import os
+
+        if create and size <= 0:
+            raise ValueError("'size' debe ser un número positivo")
+        self._name = "/" + name
+        self._flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0)
+        self._fd = _posixshmem.shm_open(self._name, self._flags, mode=self._mode)
+        try:
+            if create:
+                os.ftruncate(self._fd, size)
+            self._size = os.fstat(self._fd).st_size
+            self._mmap = mmap.mmap(self._fd, self._size)
+        except OSError:
+            os.close(self._fd)
+            if create:
+                _posixshmem.shm_unlink(self._name)
+            raise
+        self._buf = memoryview(self._mmap)
+
+    def unlink(self) -> None:
+        import _posixshmem
+        _posixshmem.shm_unlink(self._name)
+
+
+def _open(name: str, create: bool = False, size: int = 0, track: bool = True) -> shared_memory.SharedMemory:
+    if _TRACK_PARAM:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=track)
+    if track or not getattr(shared_memory, "_USE_POSIX", False):
+        # En Windows el segmento desaparece con el último proceso que lo abre
+        return shared_memory.SharedMemory(name=name, create=create, size=size)
+    return _UntrackedSharedMemory(name, create, size)
+
+
+# Cabecera ya decodificada de cada segmento: adjuntarse de nuevo (p. ej. tras
+# soltarlo de un `SharedTableRegistry`) no vuelve a deserializar la gramática
+_META_CACHE_SIZE = 64
+_meta_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+_meta_lock = threading.Lock()
+
+
+def _cache_meta(name: str, meta_len: int, meta: Dict[str, Any]) -> None:
+    with _meta_lock:
+        _meta_cache[(name, meta_len)] = meta
+        _meta_cache.move_to_end((name, meta_len))
+        while len(_meta_cache) > _META_CACHE_SIZE:
+            _meta_cache.popitem(last=False)
+
+
+class SharedTables:
+    """Tablas adjuntas a un segmento compartido (matrices de solo lectura)."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, tables: DenseTables, grammar: Optional[Grammar],
+                 owner: bool, tracked: bool):
+        self.shm = shm
+        self.tables = tables
+        self.grammar = grammar
+        self.owner = owner
+        self.tracked = tracked
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def parser(self) -> LR1Parser:
+        return self.tables.parser(self.grammar)
+
+    def close(self) -> None:
+        # Las vistas NumPy deben soltarse antes de cerrar el mapeo
+        self.tables = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
+
+
+def publish(tables: DenseTables, key: str, grammar: Optional[Grammar] = None, track: bool = True) -> SharedTables:
+    """
+    Publica `tables` en memoria compartida. Si otro proceso ya publicó la
+    misma gramática, se adjunta a su segmento. Con `track=False` el segmento
+    sobrevive a este proceso y alguien debe llamar a `unlink`.
+    """
+    arrays = {name: np.ascontiguousarray(getattr(tables, name)) for name in _ARRAYS}
+    layout = {}
+    offset = 0
+    for name, arr in arrays.items():
+        layout[name] = (offset, arr.shape, arr.dtype.str)
+        offset = _align(offset + arr.nbytes)
+    header = {
+        "terminals": tables.terminals,
+        "nonterminals": tables.nonterminals,
+        "productions": tables.productions,
+        "grammar": grammar,
+        "layout": layout,
+    }
+    meta = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+    data_start = _align(_HEADER.size + len(meta))
+
+    try:
+        shm = _open(segment_name(key), create=True, size=max(data_start + offset, 1), track=track)
+    except FileExistsError:
+        return attach(key)
+    buf = shm.buf
+    buf[_HEADER.size:_HEADER.size + len(meta)] = meta
+    for name, arr in arrays.items():
+        start, shape, dtype = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=buf, offset=data_start + start)[...] = arr
+    _HEADER.pack_into(buf, 0, _MAGIC, len(meta))
+    _cache_meta(shm.name, len(meta), header)
+    return _view(shm, owner=True, tracked=track)
+
+
+def attach(key: str, timeout: float = 5.0) -> SharedTables:
+    """Se adjunta en modo solo lectura; FileNotFoundError si no está publicada."""
+    shm = _open(segment_name(key), track=False)
+    deadline = time.monotonic() + timeout
+    while _HEADER.unpack_from(shm.buf, 0)[0] != _MAGIC:
+        if time.monotonic() > deadline:
+            shm.close()
+            raise TimeoutError(f"El segmento {shm.name} no terminó de publicarse")
+        time.sleep(0.001)
+    return _view(shm, owner=False, tracked=False)
+
+
+def _view(shm: shared_memory.SharedMemory, owner: bool, tracked: bool) -> SharedTables:
+    _, meta_len = _HEADER.unpack_from(shm.buf, 0)
+    with _meta_lock:
+        meta = _meta_cache.get((shm.name, meta_len))
+    if meta is None:
+        meta = pickle.loads(shm.buf[_HEADER.size:_HEADER.size + meta_len])
+        _cache_meta(shm.name, meta_len, meta)
+    data_start = _align(_HEADER.size + meta_len)
+    arrays = {}
+    for name, (start, shape, dtype) in meta["layout"].items():
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=data_start + start)
+        arr.flags.writeable = False
+        arrays[name] = arr
+    tables = DenseTables(meta["terminals"], meta["nonterminals"], meta["productions"], **arrays)
+    return SharedTables(shm, tables, meta["grammar"], owner, tracked)
+
+
+class SharedTableRegistry:
+    """
+    Registro por proceso de tablas compartidas: publica una gramática
+    compilada si aún no está en el host y mantiene abiertas las que usa.
+    """
+
+    def __init__(self, track: bool = True):
+        self.track = track
+        self._attached: Dict[str, SharedTables] = {}
+
+    def publish(self, compiled: CompiledGrammar) -> SharedTables:
+        shared = self._attached.get(compiled.key)
+        if shared is None:
+            shared = publish(dense_tables(compiled.builder), compiled.key, compiled.grammar, track=self.track)
+            self._attached[compiled.key] = shared
+        return shared
+
+    def attach(self, key: str) -> SharedTables:
+        shared = self._attached.get(key)
+        if shared is None:
+            shared = self._attached[key] = attach(key)
+        return shared
+
+    def parser(self, key: str) -> LR1Parser:
+        return self.attach(key).parser()
+
+    def release(self, key: str, unlink: bool = False) -> None:
+        shared = self._attached.pop(key, None)
+        if shared is None:
+            if unlink:
+                try:
+                    shm = _open(segment_name(key), track=False)
+                except FileNotFoundError:
+                    return
+                shm.unlink()
+                shm.close()
+            return
+        if unlink:
+            shared.unlink()
+        shared.close()
+
+    def close(self, unlink_owned: bool = False) -> None:
+        for key, shared in list(self._attached.items()):
+            self.release(key, unlink=unlink_owned and shared.owner)
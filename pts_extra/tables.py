@@ -0,0 +1,217 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+import io
+
+import numpy as np
+
+from .grammar import Grammar, Symbol
+from .lr1 import LR1Builder
+from .parser import ActionValue, LR1Parser
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Códigos de action_kind
+ERROR = 0
+SHIFT = 1
+REDUCE = 2
+ACCEPT = 3
+
+
+@dataclass
+class DenseTables:
+    """
+    Tablas ACTION/GOTO como matrices densas (estados × símbolos).
+
+    `action_kind[s, t]` es ERROR/SHIFT/REDUCE/ACCEPT y `action_arg[s, t]` el
+    estado destino (SHIFT) o el índice en `productions` (REDUCE). `goto[s, A]`
+    vale -1 si no hay transición.
+    """
+    terminals: List[Symbol]
+    nonterminals: List[Symbol]
+    productions: List[Tuple[Symbol, Tuple[Symbol, ...]]]
+    action_kind: np.ndarray
+    action_arg: np.ndarray
+    goto: np.ndarray
+
+    @property
+    def n_states(self) -> int:
+        return self.action_kind.shape[0]
+
+    def terminal_ids(self) -> Dict[Symbol, int]:
+        return {t: i for i, t in enumerate(self.terminals)}
+
+    def nonterminal_ids(self) -> Dict[Symbol, int]:
+        return {A: i for i, A in enumerate(self.nonterminals)}
+
+    def parser(self, grammar: Optional[Grammar] = None) -> LR1Parser:
+        """`LR1Parser` que lee directamente de las matrices, sin copiarlas a dicts."""
+        return LR1Parser(grammar, DenseActionMap(self), DenseGotoMap(self))
+
+
+class DenseActionMap:
+    """Vista de solo lectura con la interfaz `get((estado, terminal))` de `LR1Builder.action`."""
+
+    def __init__(self, tables: DenseTables):
+        self._kind = tables.action_kind
+        self._arg = tables.action_arg
+        self._ids = tables.terminal_ids()
+        self._reduce = [('r', (head, list(body))) for head, body in tables.productions]
+
+    def get(self, key: Tuple[int, Symbol], default=None) -> Optional[ActionValue]:
+        s, a = key
+        t = self._ids.get(a)
+        if t is None or not 0 <= s < self._kind.shape[0]:
+            return default
+        kind = int(self._kind[s, t])
+        if kind == SHIFT:
+            return ('s', int(self._arg[s, t]))
+        if kind == REDUCE:
+            return self._reduce[int(self._arg[s, t])]
+        if kind == ACCEPT:
+            return ('acc',)
+        return default
+
+
+class DenseGotoMap:
+    """Vista de solo lectura con la interfaz `get((estado, no terminal))` de `LR1Builder.goto_table`."""
+
+    def __init__(self, tables: DenseTables):
+        self._goto = tables.goto
+        self._ids = tables.nonterminal_ids()
+
+    def get(self, key: Tuple[int, Symbol], default=None) -> Optional[int]:
+        s, A = key
+        j = self._ids.get(A)
+        if j is None or not 0 <= s < self._goto.shape[0]:
+            return default
+        target = int(self._goto[s, j])
+        return target if target >= 0 else default
+
+
+def dense_tables(builder: LR1Builder) -> DenseTables:
+    """
+    Exporta las tablas del builder a matrices NumPy. Solo se recorren las
+    entradas no vacías de ACTION/GOTO; el relleno de errores es vectorial.
+    """
+    return dense_tables_from(builder.aug, builder.action, builder.goto_table, len(builder.states))
+
+
+def dense_tables_from(aug: Grammar, action: Dict[Tuple[int, Symbol], ActionValue],
+                      goto_table: Dict[Tuple[int, Symbol], int], n_states: int) -> DenseTables:
+    """Como `dense_tables`, a partir de la gramática aumentada y los dicts ACTION/GOTO."""
+    terminals = sorted(aug.terminals | {Grammar.END_MARKER})
+    nonterminals = sorted(aug.nonterminals)
+    t_ids = {t: i for i, t in enumerate(terminals)}
+    nt_ids = {A: i for i, A in enumerate(nonterminals)}
+
+    productions: List[Tuple[Symbol, Tuple[Symbol, ...]]] = []
+    prod_ids: Dict[Tuple[Symbol, Tuple[Symbol, ...]], int] = {}
+    n = len(action)
+    rows = np.empty(n, dtype=np.int64)
+    cols = np.empty(n, dtype=np.int64)
+    kinds = np.empty(n, dtype=np.int8)
+    args = np.zeros(n, dtype=np.int32)
+    for k, ((s, a), act) in enumerate(action.items()):
+        rows[k] = s
+        cols[k] = t_ids[a]
+        if act[0] == 's':
+            kinds[k] = SHIFT
+            args[k] = act[1]
+        elif act[0] == 'r':
+            head, body = act[1]
+            key = (head, tuple(body))
+            if key not in prod_ids:
+                prod_ids[key] = len(productions)
+                productions.append(key)
+            kinds[k] = REDUCE
+            args[k] = prod_ids[key]
+        else:
+            kinds[k] = ACCEPT
+
+    action_kind = np.zeros((n_states, len(terminals)), dtype=np.int8)
+    action_arg = np.zeros((n_states, len(terminals)), dtype=np.int32)
+    action_kind[rows, cols] = kinds
+    action_arg[rows, cols] = args
+
+    goto = np.full((n_states, len(nonterminals)), -1, dtype=np.int32)
+    if goto_table:
+        keys = list(goto_table.keys())
+        g_rows = np.fromiter((s for s, _ in keys), dtype=np.int64, count=len(keys))
+        g_cols = np.fromiter((nt_ids[A] for _, A in keys), dtype=np.int64, count=len(keys))
+        goto[g_rows, g_cols] = np.fromiter(goto_table.values(), dtype=np.int32, count=len(keys))
+
+    return DenseTables(terminals, nonterminals, productions, action_kind, action_arg, goto)
+
+
+def _lazy_labels(codes: np.ndarray, fmt: Callable[[int], str], columns: List[str]) -> pd.DataFrame:
+    # pandas se importa aquí para que los workers que solo analizan no lo carguen
+    import pandas as pd
+
+    # Solo se formatea una cadena por código distinto; cada columna es un
+    # Categorical que referencia esas etiquetas.
+    uniques, inverse = np.unique(codes, return_inverse=True)
+    label_ids: Dict[str, int] = {}
+    remap = np.fromiter((label_ids.setdefault(fmt(int(c)), len(label_ids)) for c in uniques),
+                        dtype=np.int64, count=len(uniques))
+    inverse = remap[inverse].reshape(codes.shape)
+    labels = list(label_ids)
+    return pd.DataFrame(
+        {col: pd.Categorical.from_codes(inverse[:, j], categories=labels) for j, col in enumerate(columns)},
+        index=pd.RangeIndex(codes.shape[0], name="Estado"),
+    )
+
+
+def action_dataframe(tables: DenseTables) -> pd.DataFrame:
+    n_states = tables.n_states
+    n_prods = len(tables.productions)
+    # Código único por celda: [0, n) shift, [n, n + p) reduce, luego accept y vacío
+    codes = np.where(
+        tables.action_kind == SHIFT, tables.action_arg,
+        np.where(tables.action_kind == REDUCE, n_states + tables.action_arg,
+                 np.where(tables.action_kind == ACCEPT, n_states + n_prods, n_states + n_prods + 1)),
+    )
+
+    def fmt(code: int) -> str:
+        if code < n_states:
+            return f"s{code}"
+        if code < n_states + n_prods:
+            head, body = tables.productions[code - n_states]
+            return f"r({head} -> {' '.join(body) if body else Grammar.EPSILON})"
+        if code == n_states + n_prods:
+            return "accept"
+        return ""
+
+    return _lazy_labels(codes, fmt, tables.terminals)
+
+
+def goto_dataframe(tables: DenseTables) -> pd.DataFrame:
+    return _lazy_labels(tables.goto, lambda j: str(j) if j >= 0 else "", tables.nonterminals)
+
+
+def table_bytes(frame: pd.DataFrame, fmt: str = "csv") -> bytes:
+    """Serializa una tabla a CSV o Parquet (este requiere pyarrow o fastparquet)."""
+    if fmt == "csv":
+        return frame.to_csv().encode("utf-8")
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        try:
+            frame.to_parquet(buffer)
+        except ImportError as e:
+            raise RuntimeError("Exportar a Parquet requiere pyarrow o fastparquet") from e
+        return buffer.getvalue()
+    raise ValueError(f"Formato no soportado: {fmt}")
+
+
+def export_tables(tables: DenseTables, prefix: str, fmt: str = "csv") -> List[str]:
+    """Escribe `<prefix>_action.<fmt>` y `<prefix>_goto.<fmt>` y devuelve las rutas."""
+    frames = {"action": action_dataframe(tables), "goto": goto_dataframe(tables)}
+    paths: List[str] = []
+    for name, frame in frames.items():
+        data = table_bytes(frame, fmt)
+        path = f"{prefix}_{name}.{fmt}"
+        with open(path, "wb") as fh:
+            fh.write(data)
+        paths.append(path)
+    return paths
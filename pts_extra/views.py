@@ -0,0 +1,150 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from .grammar import Symbol
+from .lr1 import LR1Builder, LR1Item
+
+T = TypeVar("T")
+
+
+@dataclass
+class AutomatonView:
+    """
+    Subconjunto acotado del autómata LR(1) listo para dibujar.
+
+    `edges` agrupa las transiciones paralelas entre dos estados en una sola
+    arista con todas sus etiquetas; `collapsed` cuenta, para cada estado
+    frontera, cuántos vecinos quedaron fuera de la vista.
+    """
+    states: List[int] = field(default_factory=list)
+    edges: List[Tuple[int, int, Tuple[Symbol, ...]]] = field(default_factory=list)
+    collapsed: Dict[int, int] = field(default_factory=dict)
+    total_states: int = 0
+    focus: Optional[int] = None
+
+    @property
+    def hidden_states(self) -> int:
+        return self.total_states - len(self.states)
+
+
+def _adjacency(builder: LR1Builder) -> Dict[int, Set[int]]:
+    adj: Dict[int, Set[int]] = {}
+    for (i, _), j in builder.transitions.items():
+        adj.setdefault(i, set()).add(j)
+        adj.setdefault(j, set()).add(i)
+    return adj
+
+
+def automaton_view(
+    builder: LR1Builder,
+    focus: Optional[int] = None,
+    hops: Optional[int] = None,
+    max_states: int = 60,
+) -> AutomatonView:
+    """
+    Selecciona los estados a mostrar: el vecindario a `hops` saltos de `focus`
+    (en ambos sentidos) o, sin foco, los estados más cercanos al inicial.
+    Nunca devuelve más de `max_states` estados, así que el tamaño del DOT
+    resultante está acotado aunque el autómata tenga miles de estados.
+    """
+    total = len(builder.states)
+    if total == 0:
+        return AutomatonView(total_states=0, focus=focus)
+    origin = 0 if focus is None else focus
+    if not 0 <= origin < total:
+        raise ValueError(f"Estado fuera de rango: {origin}")
+
+    adj = _adjacency(builder)
+    dist: Dict[int, int] = {origin: 0}
+    queue = deque([origin])
+    while queue and len(dist) < max_states:
+        i = queue.popleft()
+        if hops is not None and dist[i] >= hops:
+            continue
+        for j in sorted(adj.get(i, ())):
+            if j not in dist:
+                dist[j] = dist[i] + 1
+                queue.append(j)
+                if len(dist) >= max_states:
+                    break
+
+    selected = set(dist)
+    merged: Dict[Tuple[int, int], List[Symbol]] = {}
+    collapsed: Dict[int, int] = {}
+    for (i, symbol), j in builder.transitions.items():
+        if i in selected and j in selected:
+            merged.setdefault((i, j), []).append(symbol)
+    for i in selected:
+        outside = sum(1 for j in adj.get(i, ()) if j not in selected)
+        if outside:
+            collapsed[i] = outside
+
+    return AutomatonView(
+        states=sorted(selected),
+        edges=[(i, j, tuple(sorted(labels))) for (i, j), labels in sorted(merged.items())],
+        collapsed=collapsed,
+        total_states=total,
+        focus=focus,
+    )
+
+
+def item_text(item: LR1Item) -> str:
+    rhs = list(item.body)
+    rhs.insert(item.dot, "•")
+    return f"{item.head} -> {' '.join(rhs)}"
+
+
+def _item_matches(item: LR1Item, head: Optional[Symbol], lookahead: Optional[Symbol], text: Optional[str]) -> bool:
+    if head is not None and item.head != head:
+        return False
+    if lookahead is not None and item.lookahead != lookahead:
+        return False
+    if text and text not in item_text(item):
+        return False
+    return True
+
+
+def filter_items(
+    builder: LR1Builder,
+    state: Optional[int] = None,
+    head: Optional[Symbol] = None,
+    lookahead: Optional[Symbol] = None,
+    text: Optional[str] = None,
+) -> Iterator[Tuple[int, LR1Item]]:
+    """
+    Recorre los items (estado, item) que cumplen todos los filtros dados,
+    en orden de estado y, dentro de cada estado, en orden estable.
+    """
+    state_ids = range(len(builder.states)) if state is None else [state]
+    for state_id in state_ids:
+        for item in sorted(builder.states[state_id], key=lambda x: (x.head, x.body, x.dot, x.lookahead)):
+            if _item_matches(item, head, lookahead, text):
+                yield state_id, item
+
+
+def filter_states(
+    builder: LR1Builder,
+    head: Optional[Symbol] = None,
+    lookahead: Optional[Symbol] = None,
+    text: Optional[str] = None,
+) -> List[int]:
+    """Estados con al menos un item que cumple los filtros."""
+    if head is None and lookahead is None and not text:
+        return list(range(len(builder.states)))
+    return [
+        i for i, state in enumerate(builder.states)
+        if any(_item_matches(item, head, lookahead, text) for item in state)
+    ]
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+
+def paginate(seq: Sequence[T], page: int, page_size: int) -> Sequence[T]:
+    """Página `page` (desde 1) de `seq`; fuera de rango se ajusta al extremo."""
+    page = min(max(page, 1), page_count(len(seq), page_size))
+    start = (page - 1) * page_size
+    return seq[start:start + page_size]
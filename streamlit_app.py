@@ -1,7 +1,13 @@
 import sys
 import os
-from typing import List, Dict
-
+import time
+import threading
+import uuid
+from typing import List, Dict, Set, Tuple
+import hashlib
+import html
+
+import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
 # Ensure repo root is on path (this file is already at repo root, but keep robust for cloud)
@@ -13,51 +19,32 @@ from pts_extra.grammar import Grammar
 from pts_extra.lr1 import LR1Builder
 from pts_extra.parser import LR1Parser
 from pts_extra.automata import construir_automata_lr1, render_automata_svg_interactivo, render_afn_items_lr1
-
-def build_derivation(reductions, grammar: Grammar) -> List[str]:
-    if not reductions:
-        return []
-    derivation = []
-    # Start symbol
-    derivation.append(grammar.start_symbol)
-    for head, body in reversed(reductions):
-        body_str = Grammar.EPSILON if body == [Grammar.EPSILON] else " ".join(body)
-        derivation.append(f"{head} -> {body_str}")
-    return derivation
-
-
-def format_action_table(builder: LR1Builder) -> List[Dict[str, str]]:
-    terminals = sorted(list(builder.aug.terminals | {Grammar.END_MARKER}))
-    rows: List[Dict[str, str]] = []
-    for state_id in range(len(builder.states)):
-        row: Dict[str, str] = {"Estado": str(state_id)}
-        for terminal in terminals:
-            key = (state_id, terminal)
-            if key in builder.action:
-                action = builder.action[key]
-                if action[0] == 's':
-                    row[terminal] = f"s{action[1]}"
-                elif action[0] == 'r':
-                    head, body = action[1]
-                    row[terminal] = f"r({head} -> {' '.join(body) if body else Grammar.EPSILON})"
-                elif action[0] == 'acc':
-                    row[terminal] = "accept"
-            else:
-                row[terminal] = ""
-        rows.append(row)
-    return rows
-
-
-def format_goto_table(builder: LR1Builder) -> List[Dict[str, str]]:
-    nonterminals = sorted(list(builder.aug.nonterminals))
-    rows: List[Dict[str, str]] = []
-    for state_id in range(len(builder.states)):
-        row: Dict[str, str] = {"Estado": str(state_id)}
-        for nt in nonterminals:
-            key = (state_id, nt)
-            row[nt] = str(builder.goto_table[key]) if key in builder.goto_table else ""
-        rows.append(row)
-    return rows
+from pts_extra.pipeline import CompiledGrammar, CompiledRegistry
+from pts_extra.background import BuildJob
+from pts_extra.derivation import Derivation
+from pts_extra.metrics import Metrics
+from pts_extra.reduction import count_states
+from pts_extra.sentences import SentenceGenerator
+from pts_extra.tables import action_dataframe, dense_tables, goto_dataframe, table_bytes
+from pts_extra.views import filter_items, filter_states, item_text, page_count, paginate
+
+def render_derivacion(derivacion: Derivation):
+    """
+    Derivación por la derecha paginada: solo se generan las formas
+    sentenciales de la página visible, recortadas alrededor del no
+    terminal que se expande (entre corchetes).
+    """
+    pagina, tam = paginador(len(derivacion), "derivacion")
+    inicio = (pagina - 1) * tam
+    filas = []
+    for paso, produccion, forma in derivacion.steps(inicio, inicio + tam, left=20, right=20):
+        if produccion is None:
+            regla = ""
+        else:
+            head, body = produccion
+            regla = f"{head} -> {' '.join(body) if body and body != [Grammar.EPSILON] else Grammar.EPSILON}"
+        filas.append({"Paso": paso, "Producción": regla, "Forma sentencial": forma.text()})
+    st.dataframe(filas, use_container_width=True)
 
 
 def format_parse_steps(steps: List[dict]) -> List[Dict[str, str]]:
@@ -77,13 +64,71 @@ def format_parse_steps(steps: List[dict]) -> List[Dict[str, str]]:
     return formatted
 
 
+def paginador(total: int, clave: str, tamanos=(25, 50, 100, 200)) -> Tuple[int, int]:
+    """
+    Controles de paginación; devuelve (página, tamaño de página). Solo se
+    envía al navegador la página elegida, así el tamaño de la respuesta no
+    depende del número total de filas.
+    """
+    col_tam, col_pag, col_info = st.columns([1, 1, 2])
+    with col_tam:
+        tam = st.selectbox("Por página", tamanos, index=1, key=f"{clave}_tam")
+    paginas = page_count(total, tam)
+    if st.session_state.get(f"{clave}_pag", 1) > paginas:
+        st.session_state[f"{clave}_pag"] = paginas
+    with col_pag:
+        pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, step=1, key=f"{clave}_pag")
+    with col_info:
+        st.caption(f"{total} resultados · {paginas} página(s)")
+    return int(pagina), tam
+
+
+def filtros_items(builder: LR1Builder, clave: str, cabezas: List[str] | None = None):
+    """Filtros por cabeza, lookahead y texto; devuelve (cabeza, lookahead, texto)."""
+    col_h, col_la, col_txt = st.columns(3)
+    opciones = cabezas if cabezas is not None else ["(todas)"] + sorted(builder.aug.nonterminals)
+    cabeza = col_h.selectbox("Cabeza", opciones, key=f"{clave}_cabeza")
+    lookahead = col_la.selectbox("Lookahead", ["(todos)"] + sorted(builder.aug.terminals | {Grammar.END_MARKER}),
+                                 key=f"{clave}_lookahead")
+    texto = col_txt.text_input("Buscar en items", key=f"{clave}_texto")
+    return (
+        None if cabeza == "(todas)" else cabeza,
+        None if lookahead == "(todos)" else lookahead,
+        texto.strip() or None,
+    )
+
+
 def render_states(builder: LR1Builder):
-    for state_id, state in enumerate(builder.states):
+    col_estado, col_filtros = st.columns([1, 3])
+    with col_estado:
+        estado = st.text_input("Estado", key="estados_id", placeholder="todos")
+    with col_filtros:
+        cabeza, lookahead, texto = filtros_items(builder, "estados")
+
+    if estado.strip():
+        if not estado.strip().isdigit() or int(estado) >= len(builder.states):
+            st.warning(f"Estado inválido: {estado}")
+            return
+        estados = [int(estado)] if next(filter_items(builder, int(estado), cabeza, lookahead, texto), None) else []
+    else:
+        estados = filter_states(builder, cabeza, lookahead, texto)
+
+    pagina, tam = paginador(len(estados), "estados")
+    for state_id in paginate(estados, pagina, tam):
         with st.expander(f"Estado {state_id}"):
-            for item in state:
-                rhs = list(item.body)
-                rhs.insert(item.dot, '•')
-                st.code(f"{item.head} -> {' '.join(rhs)}   |   {item.lookahead}")
+            st.code("\n".join(
+                f"{item_text(item)}   |   {item.lookahead}"
+                for _, item in filter_items(builder, state_id, cabeza, lookahead, texto)
+            ))
+
+
+def render_pasos(steps: List[dict], clave: str):
+    texto = st.text_input("Filtrar por acción", key=f"{clave}_filtro", placeholder="shift, reduce, error...")
+    if texto.strip():
+        steps = [step for step in steps if texto.strip() in step.get('action', '')]
+    pagina, tam = paginador(len(steps), clave)
+    # Solo se formatea la página visible
+    st.dataframe(format_parse_steps(paginate(steps, pagina, tam)), use_container_width=True)
 
 
 def render_lr1_items_columns(builder):
@@ -129,6 +174,167 @@ def render_lr1_items_columns(builder):
                 )
 
             st.markdown(html_items + "</div>", unsafe_allow_html=True)
+def render_rendimiento(construccion: "Metrics | None", analisis: Metrics):
+    """Pestaña de métricas: fases, contadores y exportación (JSON / Prometheus)."""
+    if construccion is None:
+        st.info("Sin métricas de construcción: la gramática se compiló sin instrumentar.")
+        construccion = Metrics()
+    cont = construccion.counters
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Estados", cont.get("states", 0))
+    c2.metric("Llamadas a closure", cont.get("closure_calls", 0))
+    c3.metric("Ítems creados", cont.get("items_created", 0))
+    c4.metric("Tokens/s", f"{analisis.gauges.get('tokens_per_second', 0):,.0f}")
+
+    todas = Metrics().merge(construccion).merge(analisis)
+    pico = construccion.gauges.get("peak_memory_bytes")
+    if pico:
+        st.caption(f"Pico de memoria de la construcción: {pico / 2**20:.1f} MiB")
+
+    st.subheader("Tiempo por fase")
+    fases = pd.DataFrame(
+        [{"Fase": f, "Tiempo (ms)": segundos * 1000, "Llamadas": todas.calls.get(f, 0)}
+         for f, segundos in sorted(todas.timings.items(), key=lambda kv: -kv[1])]
+    )
+    st.dataframe(fases, use_container_width=True, hide_index=True)
+    st.caption("Las fases se anidan: closure incluye first_of_sequence y canonical_collection incluye closure.")
+
+    st.subheader("Contadores")
+    st.dataframe(pd.DataFrame([{"Contador": k, "Valor": v} for k, v in sorted(todas.counters.items())]),
+                 use_container_width=True, hide_index=True)
+
+    d1, d2 = st.columns(2)
+    with d1:
+        st.download_button("Descargar JSON", todas.to_json(indent=2), file_name="metricas_lr1.json",
+                           mime="application/json")
+    with d2:
+        st.download_button("Descargar Prometheus", todas.to_prometheus(), file_name="metricas_lr1.prom",
+                           mime="text/plain")
+
+
+# ---------------- Caché del pipeline -----------------
+# Gramática → FIRST/FOLLOW → tablas se compila una vez por texto y se
+# comparte entre sesiones; cambiar solo la cadena de entrada reutiliza todo.
+# La construcción corre en un proceso aparte con límites de tiempo y memoria
+# configurables, para que una gramática patológica no bloquee el servidor.
+TIEMPO_MAXIMO_CONSTRUCCION = float(os.environ.get("LR1_BUILD_TIMEOUT", "60"))
+# La traza paso a paso copia la pila en cada paso (O(n²)); por encima de este
+# número de tokens no se guarda. La derivación no depende de ella.
+MAXIMO_TOKENS_TRAZA = int(os.environ.get("LR1_TRACE_MAX_TOKENS", "2000"))
+MEMORIA_MAXIMA_CONSTRUCCION = int(os.environ.get("LR1_BUILD_MEMORY_MB", "1024"))
+
+
+@st.cache_resource
+def registro_compilado() -> CompiledRegistry:
+    return CompiledRegistry(max_entries=32)
+
+
+@st.cache_resource
+def construcciones_en_curso() -> Tuple[threading.Lock, Dict[str, BuildJob], Dict[str, Set[str]]]:
+    # Trabajos por clave de gramática y sesiones que esperan a cada uno
+    return threading.Lock(), {}, {}
+
+
+def clave_texto(texto_gramatica: str) -> str:
+    # Clave del texto tal cual (no `grammar_key`, que normaliza): las líneas de
+    # los errores y conflictos deben ser las del texto de cada sesión
+    return hashlib.sha256(texto_gramatica.encode("utf-8")).hexdigest()
+
+
+def obtener_compilado(texto_gramatica: str) -> CompiledGrammar:
+    # Si el registro ya expulsó la gramática, se recompila en línea
+    return registro_compilado().get_or_compile(texto_gramatica, clave_texto(texto_gramatica))
+
+
+def compilar_gramatica(texto_gramatica: str) -> CompiledGrammar:
+    registro = registro_compilado()
+    clave = clave_texto(texto_gramatica)
+    compilado = registro.get(clave)
+    if compilado is not None:
+        return compilado
+
+    # Otras sesiones con la misma gramática esperan al mismo trabajo
+    sesion = st.session_state.setdefault("id_sesion", uuid.uuid4().hex)
+    cerrojo, trabajos, esperas = construcciones_en_curso()
+    with cerrojo:
+        job = trabajos.get(clave)
+        if job is None or job.finished:
+            job = BuildJob(texto_gramatica, timeout=TIEMPO_MAXIMO_CONSTRUCCION,
+                           memory_limit_mb=MEMORIA_MAXIMA_CONSTRUCCION, metrics=True).start()
+            trabajos[clave] = job
+            esperas[clave] = set()
+        esperas[clave].add(sesion)
+
+    if st.button("Cancelar construcción", key="cancelar_construccion"):
+        # Solo deja de esperar esta sesión; el trabajo se termina si nadie más lo espera
+        with cerrojo:
+            esperando = esperas.get(clave, set())
+            esperando.discard(sesion)
+            if not esperando and trabajos.get(clave) is job:
+                job.cancel()
+                trabajos.pop(clave, None)
+                esperas.pop(clave, None)
+        st.session_state["analisis_activo"] = False
+        st.warning("Construcción de tablas cancelada.")
+        st.stop()
+
+    barra = st.progress(0.0, text="Construyendo tablas LR(1)...")
+    while not job.finished:
+        p = job.poll()
+        procesados = p.states - p.worklist
+        barra.progress(
+            procesados / p.states if p.states else 0.0,
+            text=(f"Construyendo tablas LR(1): {p.states} estados, {p.worklist} pendientes, "
+                  f"{p.closure_calls} cierres · {p.elapsed:.1f} s"),
+        )
+        time.sleep(0.2)
+    barra.empty()
+    with cerrojo:
+        if trabajos.get(clave) is job:
+            trabajos.pop(clave, None)
+            esperas.pop(clave, None)
+
+    compilado = job.result()  # RuntimeError con el motivo si falló o se canceló
+    registro.put(compilado, clave)
+    return compilado
+
+
+@st.cache_data(max_entries=32, show_spinner="Construyendo la gramática sin reducir...")
+def estados_sin_reducir(texto_gramatica: str) -> int:
+    return count_states(Grammar.parse_bnf(texto_gramatica))
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def tablas_cacheadas(texto_gramatica: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    tablas = dense_tables(obtener_compilado(texto_gramatica).builder)
+    return action_dataframe(tablas), goto_dataframe(tablas)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def tabla_exportada(texto_gramatica: str, tabla: str, fmt: str) -> bytes:
+    action_df, goto_df = tablas_cacheadas(texto_gramatica)
+    return table_bytes(action_df if tabla == "action" else goto_df, fmt)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def items_filtrados(texto_gramatica: str, cabeza, lookahead, texto) -> list:
+    # cache_resource no copia la lista: paginar solo trocea el resultado ya filtrado
+    builder = obtener_compilado(texto_gramatica).builder
+    return list(filter_items(builder, head=cabeza, lookahead=lookahead, text=texto))
+
+
+@st.cache_data(max_entries=64, show_spinner="Dibujando autómata...")
+def render_afd_cacheado(texto_gramatica: str, foco, saltos, max_estados, mostrar_items) -> str:
+    builder = obtener_compilado(texto_gramatica).builder
+    return render_automata_svg_interactivo(builder, foco, saltos, max_estados, mostrar_items)
+
+
+@st.cache_data(max_entries=64, show_spinner="Dibujando AFN de items...")
+def render_afn_cacheado(texto_gramatica: str, foco, saltos, max_estados) -> str:
+    builder = obtener_compilado(texto_gramatica).builder
+    return render_afn_items_lr1(builder, foco, saltos, max_estados)
+
+
 # ---------------- UI -----------------
 st.set_page_config(page_title="Analizador LR(1)", page_icon="📊", layout="wide")
 st.title("Analizador LR(1) • Streamlit")
@@ -231,6 +437,16 @@ with st.container():
                 st.session_state["input_string"] = preset_input or PRESETS[preset_name]["inputs"][0]
                 st.rerun()
 
+def generar_cadena_aleatoria():
+    """Callback: reemplaza la cadena por una oración aleatoria de la gramática."""
+    texto = st.session_state.get("grammar_text", "")
+    try:
+        generador = SentenceGenerator(Grammar.parse_bnf(texto), max_length=30)
+        st.session_state["input_string"] = " ".join(generador.sentence())
+    except ValueError as e:
+        st.session_state["aviso_generador"] = str(e)
+
+
 col1, col2 = st.columns([3, 2])
 with col1:
     grammar_text = st.text_area(
@@ -246,30 +462,41 @@ with col2:
         value=st.session_state.get("input_string", "id + id * id"),
         key="input_string",
     )
-    analyze = st.button("Analizar", type="primary")
-
+    if "aviso_generador" in st.session_state:
+        st.warning(st.session_state.pop("aviso_generador"))
+    botones = st.columns(2)
+    with botones[0]:
+        analyze = st.button("Analizar", type="primary")
+    with botones[1]:
+        st.button("Cadena aleatoria", on_click=generar_cadena_aleatoria,
+                  help="Genera una oración válida de la gramática (hasta 30 tokens)")
+
+# El análisis queda activo entre recargas para que los controles de las
+# pestañas (vista del autómata, etc.) no descarten el resultado.
 if analyze:
-    grammar_text = (grammar_text or "").strip()
+    st.session_state["analisis_activo"] = True
+
+if st.session_state.get("analisis_activo"):
+    texto_original = grammar_text or ""
+    grammar_text = texto_original.strip()
     input_string = (input_string or "").strip()
 
     if not grammar_text or not input_string:
         st.error("Por favor proporciona tanto la gramática como la cadena de entrada.")
         st.stop()
 
+    # Se usa el texto sin normalizar para que los errores citen sus líneas
+    texto_gramatica = texto_original
     try:
-        grammar = Grammar.parse_bnf(grammar_text)
-        first = grammar.compute_first()
-        follow = grammar.compute_follow()
+        compilado = compilar_gramatica(texto_gramatica)
     except Exception as e:
         st.error(f"Error al procesar la gramática: {e}")
         st.stop()
 
-    builder = LR1Builder(grammar)
-    try:
-        builder.build_tables()
-    except Exception as e:
-        st.error(f"Error construyendo tablas LR(1): {e}")
-        st.stop()
+    grammar = compilado.grammar
+    first = compilado.first
+    follow = compilado.follow
+    builder = compilado.builder
 
     if builder.conflicts:
         st.error("La gramática tiene conflictos y no es LR(1).")
@@ -279,11 +506,12 @@ if analyze:
         st.stop()
 
     # Parse input
-    parser = LR1Parser(grammar, builder.action, builder.goto_table)
+    metricas_analisis = Metrics()
+    parser = LR1Parser(grammar, builder.action, builder.goto_table, metricas_analisis)
     tokens = input_string.split()
 
     try:
-        result = parser.parse(tokens)
+        result = parser.parse(tokens, trace=len(tokens) <= MAXIMO_TOKENS_TRAZA)
     except Exception as e:
         st.error(f"Error durante el análisis: {e}")
         st.stop()
@@ -291,20 +519,18 @@ if analyze:
     if not result.get('accepted'):
         st.error(result.get('error', 'La cadena no es aceptada por la gramática'))
         with st.expander("Ver pasos del análisis"):
-            steps = format_parse_steps(result.get('steps', []))
-            if steps:
-                st.dataframe(steps, use_container_width=True)
+            if result.get('steps'):
+                render_pasos(result['steps'], "pasos_error")
         st.stop()
 
     # Success
     st.success("Cadena aceptada. La cadena pertenece al lenguaje generado por la gramática.")
 
-    derivation = build_derivation(result.get('reductions', []), grammar)
-    action_rows = format_action_table(builder)
-    goto_rows = format_goto_table(builder)
-    steps = format_parse_steps(result.get('steps', []))
+    derivation = Derivation.from_result(result, tokens, grammar)
+    action_df, goto_df = tablas_cacheadas(texto_gramatica)
+    steps = result.get('steps', [])
 
-    tabs = st.tabs(["Gramática", "Tabla de derivación", "Ampliación LR1", "Pasos", "Estados","Automatas"])
+    tabs = st.tabs(["Gramática", "Tabla de derivación", "Ampliación LR1", "Pasos", "Estados","Automatas", "Rendimiento"])
 
     with tabs[0]:
         st.markdown("## 📘 Resumen de la Gramática")
@@ -317,6 +543,16 @@ if analyze:
         col3.metric("No terminales", len(grammar.nonterminals))
         col4.metric("Estados LR(1)", len(builder.states))
 
+        reduccion = compilado.reduction
+        if reduccion is not None and (reduccion.changed or reduccion.warnings):
+            with st.expander("Simplificación de la gramática"):
+                for linea in reduccion.lines():
+                    st.markdown(f"- {html.escape(linea)}")
+                if st.button("Comparar estados con la gramática original", key="comparar_estados"):
+                    antes = estados_sin_reducir(texto_gramatica)
+                    st.metric("Estados LR(1)", len(builder.states), delta=len(builder.states) - antes,
+                              delta_color="inverse")
+
         st.markdown("---")
 
         # --- Bloques laterales: símbolos terminales y no terminales ---
@@ -392,59 +628,58 @@ if analyze:
         )
 
     with tabs[1]:
-        st.markdown("#### Tabla ACTION")
-        st.dataframe(action_rows, use_container_width=True)
-        st.markdown("#### Tabla GOTO")
-        st.dataframe(goto_rows, use_container_width=True)
+        formato = st.radio("Formato de exportación", ["csv", "parquet"], horizontal=True, key="formato_tablas")
+        for titulo, tabla, df in (("ACTION", "action", action_df), ("GOTO", "goto", goto_df)):
+            st.markdown(f"#### Tabla {titulo}")
+            st.dataframe(df, use_container_width=True)
+            try:
+                datos = tabla_exportada(texto_gramatica, tabla, formato)
+            except RuntimeError as e:
+                st.caption(str(e))
+            else:
+                st.download_button(f"Descargar {titulo} ({formato.upper()})", datos,
+                                   file_name=f"{tabla}.{formato}", key=f"descargar_{tabla}")
 
     with tabs[2]:
         if derivation:
-            st.markdown("### Derivación paso a paso")
-            derivation_table = []
-            for i, step in enumerate(derivation, start=1):
-                derivation_table.append({"Paso": i, "Producción": step})
-            st.dataframe(derivation_table, use_container_width=True)
+            st.markdown("### Derivación por la derecha")
+            render_derivacion(derivation)
 
-            # ---------------- NUEVA SECCIÓN: Ítems agrupados por símbolo ----------------
+            # ---------------- Ítems agrupados por símbolo (paginados) ----------------
             st.markdown("### Elementos LR(1) agrupados por símbolo")
 
-            grupos = {}
-            for state in builder.states:
-                for item in state:
-                    grupos.setdefault(item.head, []).append(item)
-
-            num_cols = min(4, len(grupos))
-            cols = st.columns(num_cols)
-
-            for i, (head, items) in enumerate(sorted(grupos.items())):
-                with cols[i % num_cols]:
-                    st.markdown(
-                        f"<div style='background-color:#111;padding:10px;border-radius:10px;'>"
-                        f"<h4 style='color:#00BFFF;text-align:center;margin-bottom:6px;'>{head}</h4>"
-                        f"<hr style='border:1px solid #333;margin:4px 0;'>",
-                        unsafe_allow_html=True
-                    )
-
-                    html_items = ""
-                    for item in items:
-                        rhs = list(item.body)
-                        rhs.insert(item.dot, "•")
-                        rhs_str = " ".join(rhs)
-                        lookaheads = ", ".join(sorted(item.lookahead))
-                        html_items += (
-                            f"<div style='font-family:Consolas,monospace;"
-                            f"margin:2px 0;padding:2px 5px;"
-                            f"background-color:#1a1a1a;border-radius:5px;'>"
-                            f"<span style='color:#FFF;'>{item.head} → {rhs_str}</span> "
-                            f"<span style='color:#00FFAA'>, {lookaheads}</span>"
-                            f"</div>"
-                        )
-
-                    st.markdown(html_items + "</div>", unsafe_allow_html=True)
+            cabezas = sorted(builder.aug.nonterminals)
+            cabeza, lookahead, texto = filtros_items(builder, "grupos", cabezas)
+            items = items_filtrados(texto_gramatica, cabeza, lookahead, texto)
+            pagina, tam = paginador(len(items), "grupos")
+
+            html_items = ""
+            for state_id, item in paginate(items, pagina, tam):
+                rhs_str = item_text(item).split(" -> ", 1)[1]
+                html_items += (
+                    f"<div style='font-family:Consolas,monospace;"
+                    f"margin:2px 0;padding:2px 5px;"
+                    f"background-color:#1a1a1a;border-radius:5px;'>"
+                    f"<span style='color:#888;'>I{state_id}</span> "
+                    f"<span style='color:#FFF;'>{html.escape(item.head)} → {html.escape(rhs_str)}</span> "
+                    f"<span style='color:#00FFAA'>, {html.escape(item.lookahead)}</span>"
+                    f"</div>"
+                )
+            st.markdown(
+                f"<div style='background-color:#111;padding:10px;border-radius:10px;'>"
+                f"<h4 style='color:#00BFFF;text-align:center;margin-bottom:6px;'>{html.escape(cabeza)}</h4>"
+                f"<hr style='border:1px solid #333;margin:4px 0;'>"
+                + html_items + "</div>",
+                unsafe_allow_html=True
+            )
 
     with tabs[3]:
         if steps:
-            st.dataframe(steps, use_container_width=True)
+            render_pasos(steps, "pasos")
+        elif len(tokens) > MAXIMO_TOKENS_TRAZA:
+            st.info(f"La entrada tiene {len(tokens)} tokens; la traza paso a paso solo se guarda hasta "
+                    f"{MAXIMO_TOKENS_TRAZA} (LR1_TRACE_MAX_TOKENS). La derivación completa está en "
+                    "'Ampliación LR1'.")
         else:
             st.info("No hay pasos para mostrar.")
 
@@ -454,17 +689,44 @@ if analyze:
     with tabs[5]:
         st.header("🔹 Autómatas LR(1)")
 
+        # --- Controles de la vista: foco, vecindario y nivel de detalle ---
+        total_estados = len(builder.states)
+        col_foco, col_saltos, col_max, col_items = st.columns(4)
+        with col_foco:
+            usar_foco = st.checkbox("Centrar en un estado", value=False)
+            foco = st.number_input("Estado", min_value=0, max_value=max(total_estados - 1, 0), value=0, step=1,
+                                   disabled=not usar_foco)
+        with col_saltos:
+            saltos = st.slider("Vecindario (saltos)", min_value=1, max_value=6, value=2, disabled=not usar_foco)
+        with col_max:
+            max_estados = st.slider("Máximo de estados", min_value=5, max_value=200, value=60, step=5)
+        with col_items:
+            mostrar_items = st.checkbox("Mostrar items en los nodos", value=False)
+
+        vista_foco = int(foco) if usar_foco else None
+        vista_saltos = saltos if usar_foco else None
+        if total_estados > max_estados and not usar_foco:
+            st.caption(f"Mostrando {max_estados} de {total_estados} estados; centra la vista en un estado para explorar el resto.")
+        if vista_foco is not None:
+            with st.expander(f"Items del estado {vista_foco}"):
+                st.code("\n".join(str(it) for it in sorted(
+                    builder.states[vista_foco], key=lambda x: (x.head, x.body, x.dot, x.lookahead))))
+
         # --- AFN (items individuales con ε) ---
         st.subheader("1️⃣ AFN de items (no determinista)")
-        afn_html = render_afn_items_lr1(builder)
+        afn_html = render_afn_cacheado(texto_gramatica, vista_foco, vista_saltos, min(max_estados, 20))
         components.html(afn_html, height=600, scrolling=False)
 
         st.divider()
 
         # --- AFD (canónico LR(1)) ---
         st.subheader("2️⃣ AFD de estados canónicos (determinista)")
-        afd_html = render_automata_svg_interactivo(builder)
+        afd_html = render_afd_cacheado(texto_gramatica, vista_foco, vista_saltos, max_estados, mostrar_items)
         components.html(afd_html, height=600, scrolling=False)
 
+    with tabs[6]:
+        st.header("⏱️ Rendimiento")
+        render_rendimiento(compilado.metrics, metricas_analisis)
+
 else:
     st.info("Ingrese la gramática y la cadena, luego presione Analizar.")
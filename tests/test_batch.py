@@ -0,0 +1,70 @@
+import dataclasses
+import random
+
+import numpy as np
+import pytest
+
+from pts_extra.batch import UNKNOWN, BatchRecognizer
+from pts_extra.pipeline import TableArtifact, compile_grammar
+from pts_extra.sentences import SentenceGenerator, mutate
+
+from benchmarks.grammars import JSON_GRAMMAR
+
+ARITHMETIC = "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id"
+PARENTHESES = "S -> ( S ) S | ε"
+
+
+def sentences(grammar, n=20, seed=5):
+    """Frases válidas, sus mutaciones y algunas con tokens desconocidos."""
+    rng = random.Random(seed)
+    valid = list(SentenceGenerator(grammar, max_length=30, seed=seed).stream(n))
+    terminals = sorted(grammar.terminals)
+    mutated = [mutate(t, terminals, rng) for t in valid]
+    unknown = [t[:len(t) // 2] + ["?"] + t[len(t) // 2:] for t in valid[:5]] + [["?"]]
+    return valid + mutated + unknown + [[]]
+
+
+def check_equivalence(artifact, inputs):
+    # Capacidad mínima para que las pilas tengan que crecer
+    recognizer = BatchRecognizer(artifact.dense_tables(), stack_capacity=2)
+    result = recognizer.recognize_sentences(inputs)
+    messages = recognizer.error_messages(inputs, result)
+    parser = artifact.parser()
+    for tokens, ok, message in zip(inputs, result.accepted, messages):
+        expected = parser.parse(tokens, trace=False)
+        assert bool(ok) == expected['accepted'], tokens
+        assert message == expected.get('error'), tokens
+    return result
+
+
+@pytest.mark.parametrize("text", [ARITHMETIC, PARENTHESES, JSON_GRAMMAR])
+def test_matches_lr1_parser(text, monkeypatch):
+    grow = BatchRecognizer._grow
+    calls = []
+    monkeypatch.setattr(BatchRecognizer, "_grow", staticmethod(lambda stack: calls.append(stack.shape) or grow(stack)))
+    artifact = TableArtifact.from_compiled(compile_grammar(text))
+    inputs = sentences(artifact.grammar)
+    result = check_equivalence(artifact, inputs)
+    assert result.accepted.any() and not result.accepted.all()
+    assert calls
+
+
+def test_unknown_tokens_are_encoded_and_rejected():
+    artifact = TableArtifact.from_compiled(compile_grammar(ARITHMETIC))
+    recognizer = BatchRecognizer(artifact.dense_tables(), stack_capacity=2)
+    tokens, lengths = recognizer.encode([["id", "?"], ["id"]])
+    assert tokens[0, 1] == UNKNOWN
+    assert list(lengths) == [2, 1]
+    result = recognizer.recognize(tokens, lengths)
+    assert list(result.accepted) == [False, True]
+    assert result.error_position[0] == 1
+    assert result.error_position[1] == -1
+
+
+def test_missing_goto():
+    artifact = TableArtifact.from_compiled(compile_grammar(ARITHMETIC))
+    # Sin GOTO(0, E) la reducción final E -> T no tiene adónde ir
+    goto = {k: v for k, v in artifact.goto.items() if k != (0, "E")}
+    broken = dataclasses.replace(artifact, goto=goto)
+    result = check_equivalence(broken, [["id"], ["id", "+", "id"], ["+"]])
+    assert np.count_nonzero(result.error_nonterminal >= 0) == 2
@@ -0,0 +1,95 @@
+import pytest
+
+from pts_extra.derivation import Derivation
+from pts_extra.grammar import Grammar
+from pts_extra.pipeline import TableArtifact, compile_grammar
+
+ARITHMETIC = "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id"
+PARENTHESES = "S -> ( S ) S | ε"
+NULLABLE = "S -> A B c\nA -> a A | ε\nB -> b | ε"
+
+
+def derive(text, sentence):
+    artifact = TableArtifact.from_compiled(compile_grammar(text))
+    tokens = sentence.split()
+    result = artifact.parser().parse(tokens, trace=False)
+    assert result['accepted']
+    return Derivation.from_result(result, tokens, artifact.grammar), result, tokens
+
+
+def reference_forms(tokens, reductions, positions):
+    """Formas sentenciales replicando las reducciones con listas, de la cadena al símbolo inicial."""
+    forms = [list(tokens)]
+    stack = []
+    pos = 0
+    for (head, body), target in zip(reductions, positions):
+        stack.extend(tokens[pos:target])
+        pos = target
+        k = 0 if body == [Grammar.EPSILON] else len(body)
+        if k:
+            del stack[-k:]
+        stack.append(head)
+        forms.append((list(stack), list(tokens[pos:])))
+    return forms
+
+
+CASES = [
+    (ARITHMETIC, "id + id * ( id + id )"),
+    (PARENTHESES, "( ( ) ) ( )"),
+    (PARENTHESES, ""),
+    (NULLABLE, "c"),
+    (NULLABLE, "a a b c"),
+    (NULLABLE, "a c"),
+]
+
+
+@pytest.mark.parametrize("text, sentence", CASES)
+def test_forms_and_productions_match_reference(text, sentence):
+    derivation, result, tokens = derive(text, sentence)
+    forms = reference_forms(tokens, result['reductions'], result['positions'])
+    assert len(derivation) == len(forms)
+    # Paso 0: símbolo inicial; último paso: la cadena
+    assert derivation.form(0) == [derivation.start_symbol]
+    assert derivation.form(len(derivation) - 1) == tokens
+    for step in range(len(derivation)):
+        expected = forms[len(forms) - 1 - step]
+        if step < len(derivation) - 1:
+            expected = expected[0] + expected[1]
+        assert derivation.form(step) == expected
+        expected_production = None if step == 0 else result['reductions'][len(result['reductions']) - step]
+        assert derivation.production(step) == expected_production
+
+
+@pytest.mark.parametrize("text, sentence", CASES)
+def test_window_hidden_counts(text, sentence):
+    derivation, result, tokens = derive(text, sentence)
+    forms = reference_forms(tokens, result['reductions'], result['positions'])
+    for left, right in ((1, 1), (2, 3), (50, 50)):
+        for step in range(len(derivation)):
+            w = derivation.window(step, left, right)
+            if step == len(derivation) - 1:
+                stack, rest = [], tokens
+            else:
+                stack, rest = forms[len(forms) - 1 - step]
+            assert w.stack == stack[len(stack) - min(left, len(stack)):]
+            assert w.hidden_left == len(stack) - len(w.stack)
+            assert w.input == rest[:right]
+            assert w.hidden_right == len(rest) - len(w.input)
+
+
+def test_window_text_marks_top_and_hidden_symbols():
+    derivation, _, _ = derive(ARITHMETIC, "id + id * id")
+    # Paso en que la forma es E + T * id: la pila es E + T y falta "* id"
+    step = next(s for s in range(len(derivation)) if derivation.form(s) == ["E", "+", "T", "*", "id"])
+    assert derivation.window(step, left=2, right=1).text() == "…(+1) + [T] * …(+1)"
+
+
+def test_steps_and_out_of_range():
+    derivation, _, _ = derive(NULLABLE, "a b c")
+    steps = list(derivation.steps(1, 3))
+    assert [s for s, _, _ in steps] == [1, 2]
+    assert steps[0][1] == derivation.production(1)
+    with pytest.raises(IndexError):
+        derivation.form(len(derivation))
+    with pytest.raises(ValueError):
+        Derivation([], [("S", ["ε"])], [], "S")
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from pts_extra.grammar import Grammar
+from pts_extra.lazy import LazyConflictError, LazyLR1Automaton
+from pts_extra.parser import LR1Parser
+from pts_extra.pipeline import compile_grammar
+from pts_extra.sentences import SentenceGenerator, mutate
+
+from benchmarks.grammars import JSON_GRAMMAR
+
+ARITHMETIC = "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id"
+NULLABLE = "S -> A B c\nA -> a A | ε\nB -> b | ε"
+
+
+def inputs(grammar, n=15, seed=3):
+    """Frases válidas, mutaciones y una con un token desconocido."""
+    rng = random.Random(seed)
+    valid = list(SentenceGenerator(grammar, max_length=25, seed=seed).stream(n))
+    terminals = sorted(grammar.terminals)
+    return valid + [mutate(t, terminals, rng) for t in valid] + [["desconocido"], []]
+
+
+def summary(result):
+    return result['accepted'], result['reductions'], result['positions'], result['position']
+
+
+@pytest.mark.parametrize("text", [ARITHMETIC, NULLABLE, JSON_GRAMMAR])
+@pytest.mark.parametrize("max_rows", [None, 3])
+def test_lazy_parser_matches_eager(text, max_rows):
+    compiled = compile_grammar(text)
+    eager = compiled.builder
+    eager_parser = LR1Parser(compiled.grammar, eager.action, eager.goto_table)
+    automaton = LazyLR1Automaton(compiled.grammar, max_rows=max_rows)
+    lazy_parser = automaton.parser()
+    for tokens in inputs(compiled.grammar):
+        assert summary(lazy_parser.parse(tokens, trace=False)) == summary(eager_parser.parse(tokens, trace=False)), tokens
+    assert automaton.n_states <= len(eager.states)
+    if max_rows is not None:
+        assert automaton.evictions > 0
+        assert automaton.row_builds > automaton.n_states
+
+
+def test_rows_are_built_on_demand():
+    automaton = LazyLR1Automaton(Grammar.parse_bnf(JSON_GRAMMAR))
+    assert automaton.row_builds == 0
+    assert automaton.parser().parse(["null"], trace=False)['accepted']
+    assert automaton.n_states < len(compile_grammar(JSON_GRAMMAR).builder.states)
+
+
+def test_conflict_raises_and_is_not_cached():
+    automaton = LazyLR1Automaton(Grammar.parse_bnf("E -> E + E | id"))
+    parser = automaton.parser()
+    with pytest.raises(LazyConflictError) as info:
+        parser.parse(["id", "+", "id", "+", "id"], trace=False)
+    assert info.value.conflicts and all("'+'" in c for c in info.value.conflicts)
+    # Volver a visitar el estado vuelve a fallar
+    with pytest.raises(LazyConflictError):
+        automaton.row(info.value.state)
+
+
+def test_max_rows_must_be_positive():
+    with pytest.raises(ValueError):
+        LazyLR1Automaton(Grammar.parse_bnf(ARITHMETIC), max_rows=0)
@@ -0,0 +1,104 @@
+import io
+
+import pytest
+
+from pts_extra.grammar import Grammar
+from pts_extra.lr1 import LR1Builder
+from pts_extra.loader import GrammarSyntaxError, SourceSpan, load_grammar, load_grammar_text
+
+TEXT = """\
+# Expresiones
+E -> E + T | T
+
+  T -> T * F|F
+F -> ( E ) | id
+"""
+
+
+def test_productions_and_spans():
+    g = load_grammar_text(TEXT)
+    assert g.start_symbol == "E"
+    assert g.productions["T"] == [["T", "*", "F"], ["F"]]
+    assert g.terminals == {"+", "*", "(", ")", "id"}
+    # Línea y columna (desde 1) del primer símbolo de cada alternativa
+    assert g.spans["E"] == [SourceSpan(2, 6), SourceSpan(2, 14)]
+    assert g.spans["T"] == [SourceSpan(4, 8), SourceSpan(4, 14)]
+    assert g.spans["F"] == [SourceSpan(5, 6), SourceSpan(5, 14)]
+    assert g.span("F", ["id"]) == SourceSpan(5, 14)
+
+
+def test_symbols_are_interned():
+    g = load_grammar_text("S -> " + "abc " * 3 + "| S abc")
+    first, second = g.productions["S"]
+    assert first[0] is first[1] is second[1]
+    assert second[0] is g.start_symbol
+
+
+def test_epsilon_spellings():
+    g = load_grammar_text("S -> a S | ε\nA -> epsilon | EPSILON")
+    assert g.productions["S"][1] == [Grammar.EPSILON]
+    assert g.productions["A"] == [[Grammar.EPSILON], [Grammar.EPSILON]]
+
+
+def test_quoted_terminals_and_bar_inside_quotes():
+    g = load_grammar_text("S -> S '|' T | \"a b\" | 'x'\nT -> t")
+    assert g.productions["S"] == [["S", "|", "T"], ["a b"], ["x"]]
+    assert g.spans["S"] == [SourceSpan(1, 6), SourceSpan(1, 16), SourceSpan(1, 24)]
+
+
+@pytest.mark.parametrize("text, line, message", [
+    ("S -> a\n\nfoo bar\n", 3, "falta '->'"),
+    ("S -> a\n -> b\n", 2, "Falta el no terminal"),
+    ("S -> a\n%sync\n", 2, "Uso: %sync"),
+    ("S -> a\n%start S\n", 2, "Directiva desconocida"),
+    ("S -> a ; S\n%sync , S\n", 2, "',' no es un terminal"),
+    ("S -> a ; S\n%sync ; T\n", 2, "'T' no es un no terminal"),
+])
+def test_syntax_errors_cite_the_line(text, line, message):
+    with pytest.raises(GrammarSyntaxError, match=message) as info:
+        load_grammar_text(text, "g.bnf")
+    assert info.value.line == line
+    assert str(info.value).startswith(f"g.bnf:{line}: ")
+
+
+def test_empty_grammar():
+    with pytest.raises(ValueError, match="vacía"):
+        load_grammar_text("# nada\n\n")
+
+
+def test_sync_directive():
+    g = load_grammar_text("%sync ; S\nL -> L ; S | S\nS -> id")
+    assert g.sync == (";", "S")
+    assert g.start_symbol == "L"
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_load_from_path(tmp_path, use_mmap):
+    path = tmp_path / "g.bnf"
+    path.write_text(TEXT + "X -> 'ñ'\n", encoding="utf-8")
+    g = load_grammar(path, use_mmap=use_mmap)
+    expected = load_grammar_text(TEXT + "X -> 'ñ'\n")
+    assert g.productions == expected.productions
+    assert g.spans == expected.spans
+    assert g.source == str(path)
+
+
+def test_load_empty_file_with_mmap(tmp_path):
+    path = tmp_path / "vacia.bnf"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError, match="vacía"):
+        load_grammar(path, use_mmap=True)
+
+
+def test_load_from_open_files():
+    text = load_grammar(io.StringIO(TEXT))
+    binary = load_grammar(io.BytesIO(TEXT.encode("utf-8")))
+    assert text.productions == binary.productions == load_grammar_text(TEXT).productions
+
+
+def test_conflict_messages_cite_lines():
+    g = load_grammar_text("# ambigua\nE -> E + E\nE -> id")
+    builder = LR1Builder(g)
+    builder.build_tables()
+    assert builder.conflicts
+    assert all("E -> E + E: línea 2" in c for c in builder.conflicts)
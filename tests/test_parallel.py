@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pts_extra.metrics import Metrics
+from pts_extra.parallel import ParallelParser, _init_worker
+from pts_extra.pipeline import TableArtifact, compile_grammar
+
+STATEMENTS = """
+L -> L ; S | S
+S -> id = E
+E -> E + id | id
+%sync ; S
+"""
+
+LISTS = """
+L -> [ Es ]
+Es -> Es , E | E
+E -> id | L
+%sync , E
+"""
+
+
+def artifact(text):
+    return TableArtifact.from_compiled(compile_grammar(text))
+
+
+def parallel_parser(art, **options):
+    # Ejecutor en el mismo proceso: los "workers" son hilos que comparten el estado del módulo
+    parser = ParallelParser(art, min_tokens=1, task_tokens=8, executor=ThreadPoolExecutor(2), **options)
+    _init_worker(*parser._initargs)
+    return parser
+
+
+def assert_same_as_sequential(art, parser, tokens):
+    expected = art.parser().parse(tokens, trace=False)
+    result = parser.parse(tokens)
+    assert result['accepted'] == expected['accepted']
+    assert result.get('error') == expected.get('error')
+    assert result['reductions'] == expected['reductions']
+    assert result['positions'] == expected['positions']
+    return result
+
+
+def statements(n):
+    tokens = []
+    for i in range(n):
+        if i:
+            tokens.append(";")
+        tokens += ["id", "=", "id"] + ["+", "id"] * (i % 3)
+    return tokens
+
+
+def test_stitched_parse_matches_sequential():
+    art = artifact(STATEMENTS)
+    with parallel_parser(art) as parser:
+        assert_same_as_sequential(art, parser, statements(50))
+        assert parser.last_stats["parallel"]
+        assert parser.last_stats["used"] == 50
+
+
+def test_segments_that_are_not_a_chunk_are_parsed_token_by_token():
+    art = artifact(LISTS)
+    tokens = "[ id , [ id , id ] , id , id , [ id ] ]".split()
+    with parallel_parser(art) as parser:
+        assert_same_as_sequential(art, parser, tokens)
+        assert parser.last_stats["parallel"]
+        assert 0 < parser.last_stats["used"] < parser.last_stats["segments"]
+
+
+def test_rejected_input_falls_back_to_sequential():
+    art = artifact(STATEMENTS)
+    tokens = statements(20) + [";", "id", "=", ";", "id", "=", "id"]
+    with parallel_parser(art) as parser:
+        result = assert_same_as_sequential(art, parser, tokens)
+        assert not result['accepted']
+        assert not parser.last_stats["parallel"]
+
+
+def test_short_inputs_and_traces_are_sequential():
+    art = artifact(STATEMENTS)
+    with ParallelParser(art, min_tokens=1000) as parser:
+        assert_same_as_sequential(art, parser, statements(5))
+        assert not parser.last_stats["parallel"]
+        assert parser.parse(statements(2), trace=True)['steps']
+        assert parser._executor is None
+
+
+def test_metrics_count_parallel_parses():
+    art = artifact(STATEMENTS)
+    metrics = Metrics()
+    with parallel_parser(art, metrics=metrics) as parser:
+        parser.parse(statements(30))
+        parser.parse(["id", "="])
+    assert metrics.counters["parses"] == 2
+    assert metrics.counters["parallel_parses"] == 1
+    assert metrics.counters["accepted"] == 1
+
+
+def test_grammar_without_sync_is_rejected():
+    with pytest.raises(ValueError, match="sincronización"):
+        ParallelParser(artifact("S -> a S b | ε"))
+
+
+def test_process_pool():
+    art = artifact(STATEMENTS)
+    with ParallelParser(art, min_tokens=1, task_tokens=50, workers=2) as parser:
+        assert_same_as_sequential(art, parser, statements(200))
+        assert parser.last_stats["parallel"]
+
+
+def test_reduced_grammar_keeps_the_chunk():
+    # Con inline=True, S (una alternativa, un uso) se sustituiría en T
+    text = "L -> L ; T | T\nT -> S\nS -> id = E\nE -> E + id | id\n%sync ; S"
+    art = TableArtifact.from_compiled(compile_grammar(text, inline=True))
+    with parallel_parser(art) as parser:
+        assert_same_as_sequential(art, parser, statements(30))
+        assert parser.last_stats["parallel"]
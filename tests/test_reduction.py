@@ -0,0 +1,106 @@
+import pytest
+
+from pts_extra.grammar import Grammar
+from pts_extra.loader import SourceSpan, load_grammar_text
+from pts_extra.reduction import count_states, reduce_grammar
+
+
+def reduce(text, inline=False):
+    return reduce_grammar(load_grammar_text(text), inline)
+
+
+def test_nothing_to_remove_returns_same_grammar():
+    g = load_grammar_text("E -> E + id | id")
+    reduced, report = reduce_grammar(g)
+    assert reduced is g
+    assert not report.changed
+    assert report.lines() == []
+
+
+def test_non_productive_and_their_alternatives():
+    reduced, report = reduce("S -> a | B c\nB -> b B\nC -> B")
+    assert report.non_productive == ["B", "C"]
+    assert report.removed == [("S", ["B", "c"])]
+    assert reduced.productions == {"S": [["a"]]}
+    assert "Improductivos: B, C" in report.lines()
+
+
+def test_unreachable():
+    reduced, report = reduce("S -> a A\nA -> b\nU -> c V\nV -> d")
+    assert report.unreachable == ["U", "V"]
+    assert set(reduced.productions) == {"S", "A"}
+    assert reduced.terminals == {"a", "b"}
+
+
+def test_duplicate_alternatives_including_epsilon_spellings():
+    reduced, report = reduce("S -> a S | A\nA -> x | ε | x | epsilon\nS -> a S")
+    assert report.duplicates == [("S", ["a", "S"]), ("A", ["x"]), ("A", [Grammar.EPSILON])]
+    assert reduced.productions == {"S": [["a", "S"], ["A"]], "A": [["x"], [Grammar.EPSILON]]}
+
+
+def test_spans_stay_aligned_after_removals():
+    text = "S -> B | a A | a A | b\nA -> x | B y | z\nB -> B"
+    reduced, _ = reduce(text)
+    assert reduced.productions == {"S": [["a", "A"], ["b"]], "A": [["x"], ["z"]]}
+    assert reduced.spans["S"] == [SourceSpan(1, 10), SourceSpan(1, 22)]
+    assert reduced.spans["A"] == [SourceSpan(2, 6), SourceSpan(2, 16)]
+    assert reduced.span("A", ["z"]) == SourceSpan(2, 16)
+
+
+def test_chained_inlining():
+    text = "S -> A s | t\nA -> B x\nB -> C y\nC -> z\nD -> d\nR -> D | D"
+    reduced, report = reduce(text, inline=True)
+    assert report.inlined == ["A", "B", "C"]
+    assert reduced.productions == {"S": [["z", "y", "x", "s"], ["t"]]}
+    assert report.unreachable == ["D", "R"]
+
+
+def test_inlining_skips_start_recursion_and_shared_symbols():
+    text = "S -> A A | R\nA -> a\nR -> r R | E\nE -> ε"
+    reduced, report = reduce(text, inline=True)
+    # A se usa dos veces y R es recursivo; E (una vez, una alternativa) se sustituye por ε
+    assert report.inlined == ["E"]
+    assert reduced.productions["R"] == [["r", "R"], [Grammar.EPSILON]]
+    assert reduce(text)[0].productions["R"] == [["r", "R"], ["E"]]
+
+
+def test_start_symbol_not_productive():
+    g = load_grammar_text("S -> a S\nA -> b")
+    reduced, report = reduce_grammar(g)
+    assert reduced is g
+    assert report.warnings == ["El símbolo inicial S no genera ninguna cadena; no se reduce la gramática"]
+    assert not report.changed
+
+
+def test_state_counts():
+    text = "S -> a | a\nU -> b U"
+    reduced, report = reduce(text)
+    report.states_before = count_states(load_grammar_text(text))
+    report.states_after = count_states(reduced)
+    assert report.states_after <= report.states_before
+    assert report.lines()[-1] == f"Estados LR(1): {report.states_before} → {report.states_after}"
+
+
+def test_sync_chunk_is_kept_when_inlining():
+    # S tiene una sola alternativa y se usa una vez, pero es el no terminal de los trozos
+    reduced, report = reduce("%sync ; S\nL -> L ; T | id\nT -> S\nS -> id = id", inline=True)
+    assert report.inlined == ["T"]
+    assert reduced.productions["S"] == [["id", "=", "id"]]
+    assert reduced.sync == (";", "S")
+
+
+def test_unreachable_sync_chunk_is_kept():
+    reduced, report = reduce("%sync ; S\nL -> L ; id | id\nS -> A\nA -> id\nU -> u")
+    assert report.unreachable == ["U"]
+    assert set(reduced.productions) == {"L", "S", "A"}
+    assert reduced.sync == (";", "S")
+
+
+@pytest.mark.parametrize("text, message", [
+    ("%sync ; S\nL -> L ; id | id | S\nS -> S id", "El no terminal S de %sync"),
+    ("%sync ; S\nL -> S | B ;\nS -> id\nB -> B", "El terminal ; de %sync"),
+])
+def test_sync_directive_is_dropped_with_a_warning(text, message):
+    reduced, report = reduce(text)
+    assert reduced.sync is None
+    assert report.warnings[0].startswith(message)
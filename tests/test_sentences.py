@@ -0,0 +1,23 @@
+import pytest
+
+from pts_extra.grammar import Grammar
+from pts_extra.pipeline import TableArtifact, compile_grammar
+from pts_extra.sentences import SentenceGenerator
+
+
+def generator_and_parser(text):
+    parser = TableArtifact.from_compiled(compile_grammar(text)).parser()
+    return SentenceGenerator(Grammar.parse_bnf(text), max_length=20, seed=1), parser
+
+
+def test_rejected_sentences_are_rejected():
+    gen, parser = generator_and_parser("S -> a S b | ε")
+    sentences = list(gen.rejected(10, parser=parser))
+    assert len(sentences) == 10
+    assert not any(parser.parse(tokens, trace=False)['accepted'] for tokens in sentences)
+
+
+def test_rejected_stops_when_no_mutation_is_rejected():
+    gen, parser = generator_and_parser("S -> a S | ε")
+    with pytest.raises(ValueError, match="Ninguna mutación"):
+        list(gen.rejected(5, parser=parser, max_misses=10))
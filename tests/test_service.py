@@ -0,0 +1,207 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import pytest
+
+from pts_extra import service as service_module
+from pts_extra.service import ParseClient, ParseService
+from pts_extra.shared_tables import segment_name
+
+GRAMMAR = "S -> a S b | ε"
+OTHER = "E -> E + id | id"
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """Ejecutor en el mismo proceso cuyos lotes de análisis esperan a `gate`."""
+
+    def __init__(self):
+        super().__init__(max_workers=4)
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def submit(self, fn, *args, **kwargs):
+        if fn is service_module._parse_batch:
+            inner = fn
+
+            def fn(*a, **kw):
+                self.gate.wait(10)
+                return inner(*a, **kw)
+        return super().submit(fn, *args, **kwargs)
+
+
+def run_service(test, **options):
+    """Arranca el servicio en el puerto 0 y ejecuta `test(service, host, port)`."""
+    executor = GatedExecutor()
+
+    async def main():
+        svc = ParseService(executor=executor, **options)
+        host, port = await svc.start("127.0.0.1", 0)
+        try:
+            await asyncio.wait_for(test(svc, host, port), 30)
+        finally:
+            executor.gate.set()
+            await svc.close()
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown(wait=True)
+
+
+def segment_exists(key):
+    try:
+        shm = shared_memory.SharedMemory(name=segment_name(key))
+    except FileNotFoundError:
+        return False
+    # Python < 3.13 registra también los segmentos a los que solo se adjunta
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    shm.close()
+    return True
+
+
+def test_compile_parse_and_stats():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            compiled = await client.compile(GRAMMAR)
+            assert compiled["conflicts"] == []
+            assert compiled["states"] > 0
+            results = await client.parse(["a b", "a a b b", "a b b"], key=compiled["key"])
+            assert [r["accepted"] for r in results] == [True, True, False]
+            assert results[2]["error"].startswith("No hay acción")
+            # Por texto se reutiliza la misma compilación
+            results = await client.parse(["", "a a b"], grammar=GRAMMAR)
+            assert [r["accepted"] for r in results] == [True, False]
+            stats = await client.request("stats")
+            assert stats["grammars"] == 1
+            assert stats["requests"] == 4
+
+    run_service(test)
+
+
+def test_concurrent_requests_are_batched():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            key = (await client.compile(GRAMMAR))["key"]
+            inputs = ["a " * i + "b " * i for i in range(20)]
+            results = await asyncio.gather(*(client.parse([line], key=key) for line in inputs))
+            assert all(r[0]["accepted"] for r in results)
+            assert svc.batches < len(inputs)
+
+    run_service(test, max_delay=0.05)
+
+
+def test_unknown_grammar_key():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            with pytest.raises(RuntimeError, match="LookupError"):
+                await client.parse(["a b"], key="0" * 64)
+
+    run_service(test)
+
+
+def test_invalid_json_lines():
+    async def test(svc, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b'{"id": 1, "op": \n[1, 2]\n{"id": 2, "op": "stats"}\n')
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+        await writer.wait_closed()
+        invalid = [r for r in responses if r["id"] is None]
+        assert len(invalid) == 2
+        assert all(not r["ok"] and r["error"].startswith("Petición inválida") for r in invalid)
+        assert [r["ok"] for r in responses if r["id"] == 2] == [True]
+
+    run_service(test)
+
+
+def test_backpressure_at_inflight_limit():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            key = (await client.compile(GRAMMAR))["key"]
+            svc.executor.gate.clear()
+            pending = [asyncio.ensure_future(client.parse(["a b"], key=key)) for _ in range(5)]
+            await asyncio.sleep(0.2)
+            # Con el pool detenido solo se han leído `max_inflight` peticiones
+            assert svc.inflight == 2
+            assert svc.requests == 3
+            svc.executor.gate.set()
+            results = await asyncio.gather(*pending)
+            assert all(r[0]["accepted"] for r in results)
+            assert svc.requests == 6
+
+    run_service(test, max_inflight=2)
+
+
+def test_evicted_grammar_stays_published_while_batch_in_flight():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            key = (await client.compile(GRAMMAR))["key"]
+            svc.executor.gate.clear()
+            pending = asyncio.ensure_future(client.parse(["a a b b"], key=key))
+            await asyncio.sleep(0.1)
+            # Compilar otra gramática expulsa la primera del registro
+            await client.compile(OTHER)
+            assert key not in svc.registry
+            assert segment_exists(key)
+            svc.executor.gate.set()
+            assert (await pending)[0]["accepted"]
+            assert not segment_exists(key)
+
+    run_service(test, max_grammars=1)
+
+
+def test_malformed_inputs_do_not_affect_other_requests():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as bad, await ParseClient().connect(host, port) as good:
+            key = (await good.compile(GRAMMAR))["key"]
+            outcomes = await asyncio.gather(
+                bad.request("parse", key=key, inputs=[123]),
+                bad.request("parse", key=key, inputs="a b"),
+                bad.request("parse", key=key, input=["a b"]),
+                good.parse(["a b", "a a b b"], key=key),
+                return_exceptions=True,
+            )
+            assert all(isinstance(o, RuntimeError) and "ValueError" in str(o) for o in outcomes[:3])
+            assert [r["accepted"] for r in outcomes[3]] == [True, True]
+
+    run_service(test, max_delay=0.05)
+
+
+def test_parse_batch_reports_errors_per_line():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            key = (await client.compile(GRAMMAR))["key"]
+        results = service_module._parse_batch(key, ["a b", 123, "a"])
+        assert [r["accepted"] for r in results] == [True, False, False]
+        assert results[1]["error"].startswith("AttributeError")
+        assert results[2]["error"].startswith("No hay acción")
+
+    run_service(test)
+
+
+class CancellingExecutor(ThreadPoolExecutor):
+    """Cancela cada trabajo enviado, como `shutdown(cancel_futures=True)` con trabajo en cola."""
+
+    def submit(self, fn, *args, **kwargs):
+        fut = Future()
+        fut.cancel()
+        return fut
+
+
+def test_cancelled_batch_resolves_waiting_requests():
+    async def test(svc, host, port):
+        async with await ParseClient().connect(host, port) as client:
+            key = (await client.compile(GRAMMAR))["key"]
+            svc.executor = CancellingExecutor()
+            with pytest.raises(RuntimeError, match="cancelado"):
+                await client.parse(["a b"], key=key)
+
+    run_service(test)
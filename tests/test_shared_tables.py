@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from pts_extra.pipeline import compile_grammar
+from pts_extra.shared_tables import SharedTableRegistry, attach, publish, segment_name
+from pts_extra.tables import dense_tables
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="requiere memoria compartida POSIX")
+
+
+def grammar(tag):
+    # Una gramática distinta por prueba para que no compartan segmento
+    return f"S -> {tag} S b | ε"
+
+
+def exists(key):
+    return os.path.exists(os.path.join("/dev/shm", segment_name(key)))
+
+
+def run(code):
+    """Ejecuta `code` en un proceso aparte; devuelve su stderr."""
+    prelude = "from pts_extra.pipeline import compile_grammar\n" \
+              "from pts_extra.shared_tables import SharedTableRegistry, attach, publish\n" \
+              "from pts_extra.tables import dense_tables\n"
+    proc = subprocess.run([sys.executable, "-c", prelude + textwrap.dedent(code)], cwd=ROOT,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stderr
+
+
+def test_publish_and_attach_in_process():
+    compiled = compile_grammar(grammar("p"))
+    shared = publish(dense_tables(compiled.builder), compiled.key, compiled.grammar)
+    try:
+        view = attach(compiled.key)
+        assert view.parser().parse(["p", "b"], trace=False)['accepted']
+        assert not view.parser().parse(["p"], trace=False)['accepted']
+        # La cabecera se decodifica una vez por segmento
+        assert attach(compiled.key).grammar is view.grammar
+        view.close()
+    finally:
+        shared.unlink()
+        shared.close()
+    assert not exists(compiled.key)
+
+
+def test_tracked_segment_is_removed_when_owner_exits():
+    key = compile_grammar(grammar("t")).key
+    stderr = run(f"""
+        compiled = compile_grammar({grammar("t")!r})
+        SharedTableRegistry().publish(compiled)
+        # Adjuntarse en el mismo proceso no debe anular el registro del publicador
+        attach(compiled.key).close()
+    """)
+    assert not exists(key)
+    assert "Traceback" not in stderr
+
+
+def test_tracked_owner_unlink_after_attach():
+    key = compile_grammar(grammar("u")).key
+    stderr = run(f"""
+        compiled = compile_grammar({grammar("u")!r})
+        registry = SharedTableRegistry()
+        registry.publish(compiled)
+        attach(compiled.key).close()
+        registry.close(unlink_owned=True)
+    """)
+    assert not exists(key)
+    assert "KeyError" not in stderr and "leaked" not in stderr
+
+
+def test_untracked_segment_survives_and_is_shared_across_processes():
+    compiled = compile_grammar(grammar("x"))
+    stderr = run(f"""
+        compiled = compile_grammar({grammar("x")!r})
+        publish(dense_tables(compiled.builder), compiled.key, compiled.grammar, track=False).close()
+    """)
+    try:
+        assert exists(compiled.key)
+        stderr += run(f"""
+            compiled = compile_grammar({grammar("x")!r})
+            view = attach(compiled.key)
+            assert view.parser().parse(["x", "x", "b", "b"], trace=False)['accepted']
+            view.close()
+        """)
+        assert exists(compiled.key)
+        assert "KeyError" not in stderr and "leaked" not in stderr
+    finally:
+        SharedTableRegistry().release(compiled.key, unlink=True)
+    assert not exists(compiled.key)